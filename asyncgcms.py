@@ -0,0 +1,159 @@
+import asyncio
+
+from gcms import GCMS
+
+
+class AsyncGCMS:
+    """asyncio front-end that coalesces requests into batched GCMS passes.
+
+    Every call is queued and answered through a future. A single worker task
+    takes the first queued request, gathers more for up to max_latency
+    seconds or until it has max_batch of them, then applies them all, in
+    order, inside one GCMS.batch() on executor (the loop's default
+    executor if None), so the event loop keeps running meanwhile. A failed
+    request (NoBinFoundException, KeyError) fails only its own future. If
+    the worker itself stops on an error, every queued request fails with it
+    and close() re-raises it.
+
+    The queue holds at most max_queue requests; callers await a free slot,
+    which is the backpressure. Reads go through the same queue, so they see
+    every write submitted before them.
+    """
+    def __init__(self, gcms=None, max_batch=256, max_latency=0.001, max_queue=4096, executor=None):
+        self.gcms = gcms if gcms is not None else GCMS()
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self._queue = asyncio.Queue(max_queue)
+        self._worker = None
+        self._closed = False
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        """Finish the queued requests and stop the worker."""
+        if not self._closed:
+            self._closed = True
+            if self._worker is not None:
+                await self._queue.put(None)
+        if self._worker is not None:
+            await self._worker
+
+    async def _submit(self, operation, *args):
+        if self._closed:
+            raise RuntimeError("AsyncGCMS is closed")
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, args, future))
+        if self._worker.done():
+            # The worker stopped while we waited for a slot; nothing will take this
+            raise RuntimeError("AsyncGCMS is closed")
+        return await future
+
+    async def add_bin(self, bin_id, capacity):
+        return await self._submit("add_bin", bin_id, capacity)
+
+    async def resize_bin(self, bin_id, new_capacity):
+        return await self._submit("resize_bin", bin_id, new_capacity)
+
+    async def remove_bin(self, bin_id, migrate=True):
+        return await self._submit("remove_bin", bin_id, migrate)
+
+    async def move_object(self, object_id, bin_id):
+        return await self._submit("move_object", object_id, bin_id)
+
+    async def add_object(self, object_id, size, color):
+        """Place an object; return its bin id or raise NoBinFoundException."""
+        return await self._submit("add_object", object_id, size, color)
+
+    async def delete_object(self, object_id):
+        return await self._submit("delete_object", object_id)
+
+    async def object_info(self, object_id):
+        return await self._submit("object_info", object_id)
+
+    async def bin_info(self, bin_id):
+        return await self._submit("bin_info", bin_id)
+
+    async def _run(self):
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        requests = []
+        try:
+            while True:
+                request = await queue.get()
+                if request is None:
+                    return
+                requests = [request]
+                deadline = loop.time() + self.max_latency
+                stopping = False
+                while len(requests) < self.max_batch:
+                    try:
+                        request = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            request = await asyncio.wait_for(queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    if request is None:
+                        stopping = True
+                        break
+                    requests.append(request)
+                outcomes = await loop.run_in_executor(self.executor, self._apply, requests)
+                for (_, _, future), (ok, value) in zip(requests, outcomes):
+                    if future.done():
+                        continue  # Cancelled while the batch ran
+                    if ok:
+                        future.set_result(value)
+                    else:
+                        future.set_exception(value)
+                requests = []
+                if stopping:
+                    return
+        except BaseException as error:
+            # Nothing will serve the queue any more: fail what it holds
+            self._closed = True
+            if not isinstance(error, Exception):
+                error = RuntimeError("AsyncGCMS worker stopped")
+            self._fail(requests, error)
+            while True:
+                try:
+                    request = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if request is not None:
+                    self._fail([request], error)
+            raise
+
+    @staticmethod
+    def _fail(requests, error):
+        for _, _, future in requests:
+            if not future.done():
+                future.set_exception(error)
+
+    def _apply(self, requests):
+        """Run requests in one GCMS.batch(), off the event loop; return (ok, value) per request."""
+        gcms = self.gcms
+        outcomes = []
+        with gcms.batch():
+            for operation, args, future in requests:
+                if future.cancelled():
+                    outcomes.append((False, None))
+                    continue
+                try:
+                    outcomes.append((True, getattr(gcms, operation)(*args)))
+                except Exception as error:
+                    outcomes.append((False, error))
+        return outcomes
@@ -1,5 +1,4 @@
-from node import Node
-from object import Object
+import instrument
 
 def compare_objects(obj1, obj2):
     """Comparison function for AVL tree, based on object ID."""
@@ -34,10 +33,25 @@ def comp_by_id(node_1, node_2):
 
 
 class AVLTree:
-    def __init__(self, compare_function):
+    """AVL tree over intrusive nodes (left/right/parent/height fields).
+
+    Insertion and deletion are iterative: they record the search path in an
+    explicit stack and retrace it bottom-up, stopping as soon as a subtree
+    comes out with the height it had before the update, since nothing above
+    it can change from there.
+
+    An augmented tree's nodes also keep count and total aggregates over
+    their subtree. node.update_height() recomputes them from the children,
+    and updates adjust them by delta along the path before retracing, so
+    the early stop still applies.
+    """
+    __slots__ = ('root', 'size', 'comparator', 'augmented')
+
+    def __init__(self, compare_function, augmented=False):
         self.root = None
         self.size = 0
         self.comparator = compare_function
+        self.augmented = augmented
 
     def getheight(self, root):
         if root is None:
@@ -47,6 +61,8 @@ class AVLTree:
     
 
     def rotate_left(self, z):
+        if instrument.stats is not None:
+            instrument.stats.rotations += 1
         y = z.right
         z.set_right(y.left)
         y.set_left(z)
@@ -55,6 +71,8 @@ class AVLTree:
         return y  # Return y to replace z
 
     def rotate_right(self, z):
+        if instrument.stats is not None:
+            instrument.stats.rotations += 1
         y = z.left
         z.set_left(y.right)
         y.set_right(z)
@@ -80,54 +98,131 @@ class AVLTree:
 
         return node
 
-    def _insert(self, current, new_node):
-        if current is None:
-            self.size += 1
-            return new_node
+    def _replace_child(self, parent, old, new):
+        """Put new where old hangs under parent (or at the root)."""
+        if parent is None:
+            self.root = new
+            if new is not None:
+                new.parent = None
+        elif parent.left is old:
+            parent.set_left(new)
+        else:
+            parent.set_right(new)
+
+    def _retrace(self, path):
+        """Update heights and rebalance along path, deepest node last."""
+        while path:
+            node = path.pop()
+            old_height = node.height
+            subtree = self.rebalance(node)
+            if subtree is not node:
+                self._replace_child(path[-1] if path else None, node, subtree)
+            if subtree.height == old_height:
+                break  # Ancestors are unaffected
+
+    def add_to_path(self, node, count, total):
+        """Add to the aggregates of node and all its ancestors."""
+        while node is not None:
+            node.count += count
+            node.total += total
+            node = node.parent
+
+    def _own_aggregates(self, node):
+        """The count and total a node contributes by itself, excluding children."""
+        count, total = node.count, node.total
+        for child in (node.left, node.right):
+            if child is not None:
+                count -= child.count
+                total -= child.total
+        return count, total
+
+    def _path_to(self, node):
+        """Ancestors of a node in this tree, root first, via parent links."""
+        path = []
+        current = node.parent
+        while current is not None:
+            path.append(current)
+            current = current.parent
+        path.reverse()
+        return path
 
-        comparison = self.comparator(new_node, current)
+    def insertion(self, node):
+        node.left = node.right = None
+        node.update_height()  # Height 1, and resets any aggregates
 
-        if comparison < 0:
-            if current.left is None:
-                current.set_left(new_node)
-                self.size += 1
-            else:
-                current.set_left(self._insert(current.left, new_node))
-        elif comparison > 0:
-            if current.right is None:
-                current.set_right(new_node)
-                self.size += 1
+        current = self.root
+        if current is None:
+            node.parent = None
+            self.root = node
+            self.size += 1
+            return
+
+        path = self._descend(node, current)
+        if path is None:
+            return  # Prevent duplicate nodes
+
+        self.size += 1
+        if self.augmented:
+            for ancestor in path:
+                ancestor.count += node.count
+                ancestor.total += node.total
+        self._retrace(path)
+
+    def _descend(self, node, current):
+        """Link node in as a leaf under current, the root; return its ancestors,
+        root first, or None if an equal node is already in the tree."""
+        comparator = self.comparator
+        if instrument.stats is not None:
+            comparator = instrument.stats.counting(comparator)
+        path = []
+        while True:
+            comparison = comparator(node, current)
+            if comparison == 0:
+                return None
+            path.append(current)
+            if comparison < 0:
+                if current.left is None:
+                    current.set_left(node)
+                    return path
+                current = current.left
             else:
-                current.set_right(self._insert(current.right, new_node))
-        else:
-            # Handle duplicates based on ID
-            # print(f"Duplicate node found: ({current.capacity}, {current.bin_id})")
-            return current  # Prevent duplicate nodes
+                if current.right is None:
+                    current.set_right(node)
+                    return path
+                current = current.right
 
-        # After insertion, rebalance the tree and update heights
-        return self.rebalance(current)
+    def build(self, nodes):
+        """Replace the tree with a perfectly balanced one over nodes, in O(n).
 
-         
+        nodes must already be sorted by this tree's comparator, without
+        duplicates.
+        """
+        self.root = self._build(nodes, 0, len(nodes), None)
+        self.size = len(nodes)
 
-    def insertion(self, node):
-        self.root = self._insert(self.root, node)
+    def _build(self, nodes, low, high, parent):
+        # Recursion depth is only log2(n) here
+        if low >= high:
+            return None
+        middle = (low + high) // 2
+        node = nodes[middle]
+        node.parent = parent
+        node.left = self._build(nodes, low, middle, node)
+        node.right = self._build(nodes, middle + 1, high, node)
+        node.update_height()
+        return node
 
     def search_node_capacity(self, current, node):
         """
         Search for a node based on capacity and ID (if capacities are the same).
         Uses the comparator comp_by_capacity to determine the traversal.
         """
-        if current is None:
-            return None  # Node not found
-        
-        comparison = comp_by_capacity(node, current)
-
-        if comparison == 0:
-            return current  # Node found with the same capacity and ID
-        elif comparison < 0:
-            return self.search_node_capacity(current.left, node)  # Traverse left
-        else:
-            return self.search_node_capacity(current.right, node)  # Traverse right
+        while current is not None:
+            comparison = comp_by_capacity(node, current)
+            if comparison == 0:
+                return current  # Node found with the same capacity and ID
+            current = current.left if comparison < 0 else current.right
+        return None
 
     # Search function based on ID only
     def search_node_id(self, current, node):
@@ -135,141 +230,119 @@ class AVLTree:
         Search for a node based solely on the bin_id (ID).
         Uses the comparator comp_by_id to determine the traversal.
         """
-        if current is None:
-            return None  # Node not found
-        
-        comparison = comp_by_id(node, current)
-
-        if comparison == 0:
-            return current  # Node found with the same ID
-        elif comparison < 0:
-            return self.search_node_id(current.left, node)  # Traverse left
-        else:
-            return self.search_node_id(current.right, node)
+        while current is not None:
+            comparison = comp_by_id(node, current)
+            if comparison == 0:
+                return current  # Node found with the same ID
+            current = current.left if comparison < 0 else current.right
+        return None
 
     # Search function to find a node by ID
     def search(self, current, id):
-        if current is None:
-            return None
-        if current.bin_id == id:
-            return current
-        elif id < current.bin_id:
-            return self.search(current.left, id)
-        else:
-            return self.search(current.right, id)
+        if instrument.stats is not None:
+            return self._search_counted(current, id, 'bin_id')
+        while current is not None:
+            if current.bin_id == id:
+                return current
+            current = current.left if id < current.bin_id else current.right
+        return None
         
     def search_object(self, current, id):
-        if current is None:
-            return None
-        if current.object_id == id:
-            return current
-        elif id < current.object_id:
-            return self.search_object(current.left, id)
+        if instrument.stats is not None:
+            return self._search_counted(current, id, 'object_id')
+        while current is not None:
+            if current.object_id == id:
+                return current
+            current = current.left if id < current.object_id else current.right
+        return None
+
+    def _search_counted(self, current, id, key):
+        """search/search_object on key, recording the depth reached."""
+        depth = 0
+        while current is not None:
+            depth += 1
+            current_id = getattr(current, key)
+            if current_id == id:
+                break
+            current = current.left if id < current_id else current.right
+        instrument.stats.record_search(depth)
+        return current
+
+    def _unlink(self, target, path):
+        """Remove target, given its ancestors root first, and rebalance."""
+        parent = path[-1] if path else None
+        augmented = self.augmented
+        if augmented:
+            count, total = self._own_aggregates(target)
+            for ancestor in path:
+                ancestor.count -= count
+                ancestor.total -= total
+
+        if target.left is None or target.right is None:
+            self._replace_child(parent, target, target.left or target.right)
         else:
-            return self.search_object(current.right, id)
+            # Two children: the inorder successor takes target's place
+            index = len(path)
+            path.append(target)
+            successor = target.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+
+            if augmented:
+                # Nodes between target and successor lose the successor, and
+                # the successor takes over target's subtree minus target
+                successor_count, successor_total = self._own_aggregates(successor)
+                for ancestor in path[index + 1:]:
+                    ancestor.count -= successor_count
+                    ancestor.total -= successor_total
+                successor.count = target.count - count
+                successor.total = target.total - total
+
+            if path[-1] is target:
+                target.set_right(successor.right)
+            else:
+                path[-1].set_left(successor.right)
 
+            successor.set_left(target.left)
+            successor.set_right(target.right)
+            successor.height = target.height
+            self._replace_child(parent, target, successor)
+            path[index] = successor
 
+        target.left = target.right = target.parent = None
+        target.height = 1
+        self.size -= 1
+        self._retrace(path)
+        return target
 
     def delete_newobject(self , object_id):
         node_to_delete = self.search_object(self.root, object_id)
 
         if node_to_delete:
-            self.root = self._delete_newobject(self.root, node_to_delete)
-        
-
-    def _delete_newobject(self, current, node_to_delete):
-        if current is None:
-            return current
+            self._unlink(node_to_delete, self._path_to(node_to_delete))
 
-        comparison = self.comparator(node_to_delete, current)
-
-        if comparison < 0:
-            current.set_left(self._delete_newobject(current.left, node_to_delete))
-        elif comparison > 0:
-            current.set_right(self._delete_newobject(current.right, node_to_delete))
-        else:
-            if current.left is None:
-                return current.right
-            elif current.right is None:
-                return current.left
-
-            # Replace the node to delete with the leftmost node in the right subtree
-            temp = self.leftmost(current.right)
-            current.object_id, current.bin_id = temp.object_id, temp.bin_id
-            current.set_right(self._delete_newobject(current.right, temp))
-
-        return self.rebalance(current)
-
-         
     def delete_object(self, object_to_delete):
-        """Delete an object based on object_id or capacity"""
-        # Step 1: Search for the node in the ID-based tree
+        """Delete an object based on object_id"""
         node_to_delete = self.search_object(self.root, object_to_delete.object_id)
 
-        # If node found, proceed to delete
         if node_to_delete:
-            self.root = self._delete_object(self.root, node_to_delete)
-        
-
-    def _delete_object(self, current, node_to_delete):
-        if current is None:
-            return current
-
-        comparison = self.comparator(node_to_delete, current)
-
-        if comparison < 0:
-            current.set_left(self._delete_object(current.left, node_to_delete))
-        elif comparison > 0:
-            current.set_right(self._delete_object(current.right, node_to_delete))
-        else:
-            if current.left is None:
-                return current.right
-            elif current.right is None:
-                return current.left
-
-            # Replace the node to delete with the leftmost node in the right subtree
-            temp = self.leftmost(current.right)
-            current.size, current.object_id ,current.color = temp.size, temp.object_id,temp.color
-            current.set_right(self._delete_object(current.right, temp))
-
-        return self.rebalance(current)
-    # Delete function
-    def _delete(self, current, node_to_delete):
-        if current is None:
-            return current
-
-        comparison = self.comparator(node_to_delete, current)
-
-        if comparison < 0:
-            current.set_left(self._delete(current.left, node_to_delete))
-        elif comparison > 0:
-            current.set_right(self._delete(current.right, node_to_delete))
-        else:
-            # Node to delete is found
-            if current.left is None:
-                self.size -= 1
-                return current.right
-            elif current.right is None:
-                self.size -= 1
-                return current.left
-
-            # Node has two children, find inorder successor (leftmost in the right subtree)
-            temp = self.leftmost(current.right)
-            
-            # Transfer the data from the inorder successor
-            current.bin_id, current.capacity , current.objects_tree = temp.bin_id, temp.capacity , temp.objects_tree
-            
-            # Delete the inorder successor in the right subtree
-            current.set_right(self._delete(current.right, temp))
-
-        # Rebalance the tree after deletion
-        return self.rebalance(current)
+            self._unlink(node_to_delete, self._path_to(node_to_delete))
 
+    # Delete the node that compares equal to node (which may be a probe)
     def delete(self, node):
-        self.root = self._delete(self.root, node)
-
-
-    
+        comparator = self.comparator
+        if instrument.stats is not None:
+            comparator = instrument.stats.counting(comparator)
+        path = []
+        current = self.root
+        while current is not None:
+            comparison = comparator(node, current)
+            if comparison == 0:
+                return self._unlink(current, path)
+            path.append(current)
+            current = current.left if comparison < 0 else current.right
+        return None
 
     def leftmost(self, starting_node):
         current = starting_node
@@ -284,5 +357,60 @@ class AVLTree:
         return current
 
 
+class KeyedAVLTree(AVLTree):
+    """AVLTree over nodes carrying a precomputed key, compared inline.
+
+    node.key is an int (the capacity index packs (capacity, bin_id) into
+    one, see node.capacity_key), so insertion and delete compare with the
+    built-in operators instead of calling a comparator function per level.
+    """
+    __slots__ = ()
+
+    def __init__(self, augmented=False):
+        super().__init__(None, augmented)
+
+    def _descend(self, node, current):
+        key = node.key
+        path = []
+        while True:
+            current_key = current.key
+            if key == current_key:
+                return None
+            path.append(current)
+            if key < current_key:
+                if current.left is None:
+                    current.set_left(node)
+                    break
+                current = current.left
+            else:
+                if current.right is None:
+                    current.set_right(node)
+                    break
+                current = current.right
+        if instrument.stats is not None:
+            instrument.stats.comparisons += len(path)
+        return path
 
-
+    def delete(self, node):
+        """Delete the node whose key equals node.key (node may be a probe)."""
+        key = node.key
+        path = []
+        current = self.root
+        while current is not None:
+            current_key = current.key
+            if key == current_key:
+                if instrument.stats is not None:
+                    instrument.stats.comparisons += len(path) + 1
+                return self._unlink(current, path)
+            path.append(current)
+            current = current.left if key < current_key else current.right
+        return None
+
+    def search_key(self, key):
+        current = self.root
+        while current is not None:
+            current_key = current.key
+            if key == current_key:
+                return current
+            current = current.left if key < current_key else current.right
+        return None
@@ -0,0 +1 @@
+"""Measurement and benchmark drivers for GCMS. Run from the repo root."""
@@ -0,0 +1,120 @@
+"""Threaded stress test for ThreadSafeGCMS.
+
+Writer threads place and delete objects while reader threads call
+object_info and bin_info. Afterwards every bin's capacity is checked
+against its contents and the directory, then reader throughput is
+reported for each thread count.
+
+    python -m bench.concurrency --bins 1000 --threads 1,2,4,8
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exceptions import NoBinFoundException
+from object import Color
+from threadsafe import ThreadSafeGCMS
+
+COLORS = list(Color)
+
+
+def writer(gcms, first_id, operations, seed, stop):
+    rng = random.Random(seed)
+    live = []
+    next_id = first_id
+    for _ in range(operations):
+        if stop.is_set():
+            break
+        if live and rng.random() < 0.4:
+            gcms.delete_object(live.pop(rng.randrange(len(live))))
+            continue
+        try:
+            gcms.add_object(next_id, rng.randint(1, 50), rng.choice(COLORS))
+            live.append(next_id)
+        except NoBinFoundException:
+            pass
+        next_id += 1
+
+
+def reader(gcms, bin_ids, max_object_id, seed, stop, counts, slot):
+    rng = random.Random(seed)
+    done = 0
+    while not stop.is_set():
+        bin_id = rng.choice(bin_ids)
+        capacity, object_ids = gcms.bin_info(bin_id)
+        for object_id in object_ids:
+            # Objects can move out between the two calls, never into another bin
+            if gcms.object_info(object_id) not in (bin_id, None):
+                raise AssertionError(f"object {object_id} reported outside bin {bin_id}")
+        gcms.object_info(rng.randrange(max_object_id))
+        done += 2
+    counts[slot] = done
+
+
+def check(gcms, capacities):
+    sizes = {}
+    for bin_id, capacity in capacities.items():
+        remaining, object_ids = gcms.bin_info(bin_id)
+        bin = gcms.bin_manager.get(bin_id)
+        used = 0
+        for object_id in object_ids:
+            node = bin.objects_tree.search_object(bin.objects_tree.root, object_id)
+            used += node.size
+            if gcms.object_info(object_id) != bin_id:
+                raise AssertionError(f"directory disagrees on object {object_id}")
+        if remaining != capacity - used:
+            raise AssertionError(f"bin {bin_id}: capacity {remaining}, expected {capacity - used}")
+        sizes[bin_id] = remaining
+    if gcms.total_free_capacity() != sum(sizes.values()):
+        raise AssertionError("capacity index total disagrees with the bins")
+
+
+def run(bins, threads, operations, duration, seed):
+    rng = random.Random(seed)
+    capacities = {bin_id: rng.randint(500, 5000) for bin_id in range(bins)}
+    gcms = ThreadSafeGCMS()
+    gcms.add_bins(capacities.items())
+
+    stop = threading.Event()
+    counts = [0] * threads
+    bin_ids = list(capacities)
+    spacing = 10 * operations
+    workers = [threading.Thread(target=writer, args=(gcms, i * spacing, operations, seed + i, stop))
+               for i in range(threads)]
+    workers += [threading.Thread(target=reader, args=(gcms, bin_ids, threads * spacing, seed + 1000 + i,
+                                                     stop, counts, i))
+                for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    check(gcms, capacities)
+    return sum(counts) / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.concurrency", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=1000)
+    parser.add_argument("--threads", default="1,2,4,8", help="comma-separated thread counts")
+    parser.add_argument("--operations", type=int, default=20000, help="writer operations per thread")
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per run")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'threads':>8} {'reads/s':>12}")
+    for threads in (int(t) for t in args.threads.split(",")):
+        rate = run(args.bins, threads, args.operations, args.duration, args.seed)
+        print(f"{threads:>8} {rate:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure what the operation log costs per add_object, for each sync mode.
+
+Each run places the same objects into a fresh GCMS.open() durable store
+(or a plain GCMS for "off") and reports the time per add_object. Then it
+appends a few records, stays idle, and reports how long the background
+flusher took to commit them, which max_delay bounds.
+
+    python -m bench.durability --bins 20000 --objects 100000 --group-size 512 --max-delay 0.01
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import oplog
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+
+
+def place(gcms, bins, objects):
+    gcms.add_bins(bins)
+    start = time.perf_counter()
+    for object_id, size, color in objects:
+        try:
+            gcms.add_object(object_id, size, color)
+        except NoBinFoundException:
+            pass
+    gcms.commit()
+    return (time.perf_counter() - start) / len(objects)
+
+
+def tail_delay(directory, group_size, max_delay):
+    """Seconds until a partial group is on disk with no further appends."""
+    log = oplog.OperationLog(os.path.join(directory, "tail.log"), "batch", group_size, max_delay)
+    try:
+        for bin_id in range(3):
+            log.append(oplog.ADD_BIN, bin_id, 10)
+        start = time.perf_counter()
+        while len(oplog.read(log.path)[1]) < 3:
+            time.sleep(0.0005)
+        return time.perf_counter() - start
+    finally:
+        log.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.durability", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=20000)
+    parser.add_argument("--objects", type=int, default=100000)
+    parser.add_argument("--group-size", type=int, default=512)
+    parser.add_argument("--max-delay", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    bins = [(bin_id, rng.randint(100, 1000)) for bin_id in range(args.bins)]
+    objects = [(object_id, rng.randint(1, 20), rng.choice(list(Color))) for object_id in range(args.objects)]
+
+    directory = tempfile.mkdtemp(prefix="gcms-oplog-")
+    try:
+        print(f"{'sync':<8} {'add_object us':>14}")
+        print(f"{'off':<8} {place(GCMS(), bins, objects) * 1e6:>14.2f}")
+        for sync in oplog.SYNC_MODES:
+            run = os.path.join(directory, sync)
+            os.mkdir(run)
+            gcms = GCMS.open(os.path.join(run, "snapshot"), os.path.join(run, "log"), sync=sync,
+                             group_size=args.group_size, max_delay=args.max_delay)
+            try:
+                per_object = place(gcms, bins, objects)
+            finally:
+                gcms.close()
+            print(f"{sync:<8} {per_object * 1e6:>14.2f}")
+        delay = tail_delay(directory, args.group_size, args.max_delay)
+        print(f"idle partial group committed after {delay * 1000:.1f} ms (max_delay {args.max_delay * 1000:.1f} ms)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
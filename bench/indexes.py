@@ -0,0 +1,63 @@
+"""Time every capacity index engine.
+
+Bins are re-keyed the way placements do (delete, then insert with a
+smaller capacity), then ceiling queries run. tests/test_capacity_index.py
+checks that every engine answers like the AVL baseline.
+
+    python -m bench.indexes --bins 100000 --operations 200000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.runner import CAPACITY_INDEXES
+from bin import Bin
+from capacity_index import LOWEST_ID
+
+
+def benchmark(make_index, bins, operations, seed):
+    """Microseconds per re-key and per ceiling query."""
+    rnd = random.Random(seed)
+    records = sorted((Bin(bin_id, rnd.randint(100, 1000)) for bin_id in range(bins)),
+                     key=lambda bin: (bin.capacity, bin.bin_id))
+    index = make_index()
+    index.build(records)
+    shuffled = records[:]
+    rnd.shuffle(shuffled)
+    targets = [shuffled[i % bins] for i in range(operations)]
+    sizes = [rnd.randint(1, 20) for _ in range(operations)]
+
+    start = time.perf_counter()
+    for bin, size in zip(targets, sizes):
+        index.delete(bin.bin_id, bin.capacity)
+        bin.capacity = max(0, bin.capacity - size)
+        index.insert(bin)
+    rekey = time.perf_counter() - start
+
+    probes = [rnd.randint(1, 1000) for _ in range(operations)]
+    start = time.perf_counter()
+    for capacity in probes:
+        index.ceiling(capacity, LOWEST_ID)
+    ceiling = time.perf_counter() - start
+    return rekey / operations * 1e6, ceiling / operations * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.indexes", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=100000)
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'engine':<12} {'re-key us':>10} {'ceiling us':>11}")
+    for name, make_index in sorted(CAPACITY_INDEXES.items()):
+        rekey, ceiling = benchmark(make_index, args.bins, args.operations, args.seed)
+        print(f"{name:<12} {rekey:>10.2f} {ceiling:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Report resident memory per stored bin and per stored object.
+
+    python -m bench.memory --bins 10000 --objects 200000
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bin import NewAvl
+from gcms import GCMS
+from object import Color
+
+
+def measure(bins, objects, seed=0, ordered=False):
+    rnd = random.Random(seed)
+    colors = list(Color)
+
+    tracemalloc.start()
+    gcms = GCMS(NewAvl() if ordered else None)
+    base = tracemalloc.get_traced_memory()[0]
+
+    # Bins are sized so that every object fits somewhere
+    for bin_id in range(bins):
+        gcms.add_bin(bin_id, objects * 10 // bins + 100)
+    after_bins = tracemalloc.get_traced_memory()[0]
+
+    for object_id in range(objects):
+        gcms.add_object(object_id, rnd.randint(1, 10), rnd.choice(colors))
+    after_objects = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        "bins": bins,
+        "objects": objects,
+        "bytes_per_bin": (after_bins - base) / bins,
+        "bytes_per_object": (after_objects - after_bins) / objects,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bins", type=int, default=10000)
+    parser.add_argument("--objects", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ordered", action="store_true",
+                        help="use the ordered NewAvl object directory")
+    args = parser.parse_args(argv)
+
+    result = measure(args.bins, args.objects, args.seed, args.ordered)
+    print(f"bins:     {result['bins']:>10}  {result['bytes_per_bin']:8.1f} bytes/bin")
+    print(f"objects:  {result['objects']:>10}  {result['bytes_per_object']:8.1f} bytes/object")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compare RejectingGCMS with GCMS on a saturated workload.
+
+Both replay the same recorded operation stream; the placements must match
+exactly. Reports operations per second and the share of adds rejected
+without a search. The defaults fill the bins early, so most adds fail.
+
+    python -m bench.placement_cache --bins 2000 --objects 400000 --size uniform:50:800 --delete-ratio 0.02
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.workload import Workload
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from placement_cache import RejectingGCMS
+
+
+def record(workload):
+    """The workload's operations as a list, as consumed by a plain GCMS."""
+    gcms = GCMS()
+    gcms.add_bins(workload.bin_layout())
+    placed = []
+    stream = []
+    for name, args in workload.operations(placed):
+        if name == "object_info" or name == "bin_info":
+            continue  # Reads do not touch placement
+        stream.append((name, args))
+        try:
+            getattr(gcms, name)(*args)
+        except NoBinFoundException:
+            continue
+        if name == "add_object":
+            placed.append(args[0])
+    return stream
+
+
+def play(gcms, bins, stream):
+    gcms.add_bins(bins)
+    placements = []
+    start = time.perf_counter()
+    for name, args in stream:
+        if name == "delete_object":
+            gcms.delete_object(*args)
+            continue
+        try:
+            placements.append(gcms.add_object(*args))
+        except NoBinFoundException:
+            placements.append(None)
+    return placements, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.placement_cache", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=2000)
+    parser.add_argument("--objects", type=int, default=400000)
+    parser.add_argument("--capacity", default="uniform:100:1000")
+    parser.add_argument("--size", default="uniform:50:800", help="object size distribution")
+    parser.add_argument("--colors", default="BLUE,YELLOW,RED,GREEN", help="color mix, e.g. BLUE=3,RED=1")
+    parser.add_argument("--delete-ratio", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workload = Workload(args.bins, args.objects, args.capacity, args.size, args.colors,
+                        args.delete_ratio, 0.0, args.seed)
+    bins = workload.bin_layout()
+    stream = record(workload)
+
+    expected, elapsed = play(GCMS(), bins, stream)
+    print(f"{'gcms':>9} {len(stream) / elapsed:>12.0f} ops/s")
+    rejecting = RejectingGCMS()
+    placements, elapsed = play(rejecting, bins, stream)
+    if placements != expected:
+        raise AssertionError("RejectingGCMS placed objects differently")
+    print(f"{'rejecting':>9} {len(stream) / elapsed:>12.0f} ops/s")
+    for key, value in rejecting.placement_stats.as_dict().items():
+        print(f"{key:>14} {value:.3f}" if isinstance(value, float) else f"{key:>14} {value}")
+
+
+if __name__ == "__main__":
+    main()
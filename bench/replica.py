@@ -0,0 +1,122 @@
+"""Measure object_info/bin_info throughput of shared-memory replicas.
+
+The writer fills a GCMS, publishes it, and keeps placing and deleting
+objects, publishing again every --publish-every seconds, while reader
+processes query their Replica for --seconds. Reports queries per second
+for one in-process GCMS reader and for each reader process count, and
+checks the last image against the GCMS.
+
+    python -m bench.replica --bins 10000 --objects 200000 --readers 1,2,4
+"""
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from replica import Replica, ReplicaPublisher
+
+COLORS = list(Color)
+
+
+def queries(gcms_or_replica, bins, objects, seconds, seed):
+    """Alternate object_info and bin_info lookups for seconds; return the count."""
+    rng = random.Random(seed)
+    object_info, bin_info = gcms_or_replica.object_info, gcms_or_replica.bin_info
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            object_info(rng.randrange(objects))
+            bin_info(rng.randrange(bins))
+        count += 200
+    return count
+
+
+def reader(name, bins, objects, seconds, seed, start, results):
+    with Replica(name) as replica:
+        start.wait()
+        results.put(queries(replica, bins, objects, seconds, seed))
+
+
+def write(gcms, publisher, objects, seconds, publish_every, rng):
+    deadline = time.perf_counter() + seconds
+    next_publish = time.perf_counter() + publish_every
+    while time.perf_counter() < deadline:
+        object_id = rng.randrange(objects)
+        if gcms.object_info(object_id) is not None:
+            gcms.delete_object(object_id)
+        else:
+            try:
+                gcms.add_object(object_id, rng.randint(1, 20), rng.choice(COLORS))
+            except NoBinFoundException:
+                pass
+        if time.perf_counter() >= next_publish:
+            publisher.publish()
+            next_publish += publish_every
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.replica", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=10000)
+    parser.add_argument("--objects", type=int, default=200000)
+    parser.add_argument("--readers", default="1,2,4", help="comma-separated reader process counts")
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--publish-every", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    gcms = GCMS()
+    gcms.add_bins([(bin_id, rng.randint(100, 1000)) for bin_id in range(args.bins)])
+    for object_id in range(args.objects):
+        try:
+            gcms.add_object(object_id, rng.randint(1, 20), rng.choice(COLORS))
+        except NoBinFoundException:
+            pass
+
+    count = queries(gcms, args.bins, args.objects, args.seconds, args.seed)
+    print(f"{'readers':>8} {'queries/s':>12}")
+    print(f"{'gcms':>8} {count / args.seconds:>12.0f}")
+
+    context = multiprocessing.get_context()
+    with ReplicaPublisher(gcms) as publisher:
+        start = time.perf_counter()
+        publisher.publish()
+        print(f"published {args.objects} objects in {time.perf_counter() - start:.3f}s")
+        for readers in (int(n) for n in args.readers.split(",")):
+            go = context.Event()
+            results = context.Queue()
+            processes = [
+                context.Process(target=reader, args=(publisher.name, args.bins, args.objects, args.seconds,
+                                                     args.seed + i, go, results))
+                for i in range(readers)
+            ]
+            for process in processes:
+                process.start()
+            go.set()
+            write(gcms, publisher, args.objects, args.seconds, args.publish_every, rng)
+            total = sum(results.get() for _ in processes)
+            for process in processes:
+                process.join()
+            print(f"{readers:>8} {total / args.seconds:>12.0f}")
+
+        publisher.publish()
+        with Replica(publisher.name, refresh_interval=None) as replica:
+            for object_id in range(args.objects):
+                if replica.object_info(object_id) != gcms.object_info(object_id):
+                    raise AssertionError(f"Replica disagrees on object {object_id}")
+            for bin_id in range(args.bins):
+                capacity, object_ids = gcms.bin_info(bin_id)
+                if replica.bin_info(bin_id) != (capacity, list(object_ids)):
+                    raise AssertionError(f"Replica disagrees on bin {bin_id}")
+
+
+if __name__ == "__main__":
+    main()
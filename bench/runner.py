@@ -0,0 +1,136 @@
+"""Run a synthetic workload against GCMS and report per-operation latency as JSON.
+
+    python -m bench --bins 10000 --objects 200000 --delete-ratio 0.3 -o run.json
+    python -m bench ... --baseline previous.json
+"""
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.workload import Workload
+from bin import NewAvl
+from capacity_index import AVLCapacityIndex, BlockCapacityIndex, BTreeCapacityIndex, BucketCapacityIndex
+from exceptions import NoBinFoundException
+from gcms import GCMS
+
+CAPACITY_INDEXES = {
+    "avl": AVLCapacityIndex,
+    "avl-nostats": lambda: AVLCapacityIndex(order_statistics=False),
+    "bucket": BucketCapacityIndex,
+    "btree": BTreeCapacityIndex,
+    "blocks": BlockCapacityIndex,
+}
+
+
+def summarize(latencies_ns, elapsed_ns):
+    """count, throughput and latency percentiles (in microseconds) for one operation."""
+    if not latencies_ns:
+        return {"count": 0}
+    latencies_ns.sort()
+    count = len(latencies_ns)
+
+    def percentile(fraction):
+        return latencies_ns[min(count - 1, int(fraction * count))] / 1000
+
+    return {
+        "count": count,
+        "throughput_ops_s": count / (elapsed_ns / 1e9) if elapsed_ns else None,
+        "mean_us": elapsed_ns / count / 1000,
+        "p50_us": percentile(0.50),
+        "p99_us": percentile(0.99),
+        "max_us": latencies_ns[-1] / 1000,
+    }
+
+
+def run(workload, capacity_index="avl", ordered=False):
+    gcms = GCMS(NewAvl() if ordered else None, CAPACITY_INDEXES[capacity_index]())
+    clock = time.perf_counter_ns
+    latencies = {name: [] for name in ("add_bin", "add_object", "delete_object", "object_info", "bin_info")}
+
+    run_start = clock()
+    add_bin = gcms.add_bin
+    samples = latencies["add_bin"]
+    for bin_id, capacity in workload.bin_layout():
+        start = clock()
+        add_bin(bin_id, capacity)
+        samples.append(clock() - start)
+
+    placed = []
+    rejected = 0
+    for name, args in workload.operations(placed):
+        method = getattr(gcms, name)
+        start = clock()
+        try:
+            method(*args)
+        except NoBinFoundException:
+            rejected += 1
+            latencies[name].append(clock() - start)
+            continue
+        latencies[name].append(clock() - start)
+        if name == "add_object":
+            placed.append(args[0])
+    wall_ns = clock() - run_start
+
+    total = sum(len(samples) for samples in latencies.values())
+    return {
+        "wall_time_s": wall_ns / 1e9,
+        "throughput_ops_s": total / (wall_ns / 1e9),
+        "operations": {name: summarize(samples, sum(samples)) for name, samples in latencies.items()},
+        "rejected_objects": rejected,
+        "live_objects": len(placed),
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def compare(result, baseline):
+    """Print p50/p99 and throughput ratios of result against a baseline run."""
+    print(f"{'operation':<14} {'p50':>8} {'p99':>8} {'ops/s':>8}   (current / baseline)")
+    for name, current in result["operations"].items():
+        previous = baseline["operations"].get(name, {})
+        if not current.get("count") or not previous.get("count"):
+            continue
+        ratios = [current[key] / previous[key] for key in ("p50_us", "p99_us", "throughput_ops_s")]
+        print(f"{name:<14} " + " ".join(f"{ratio:8.2f}" for ratio in ratios))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--bins", type=int, default=10000)
+    parser.add_argument("--objects", type=int, default=100000, help="number of add_object calls")
+    parser.add_argument("--capacity", default="uniform:100:1000", help="bin capacity distribution")
+    parser.add_argument("--size", default="uniform:1:20",
+                        help="object size distribution: uniform:LO:HI, choice:A,B,C (or A=3,B=1) or lognormal:MU:SIGMA")
+    parser.add_argument("--colors", default="BLUE,YELLOW,RED,GREEN", help="color mix, e.g. BLUE=3,RED=1")
+    parser.add_argument("--delete-ratio", type=float, default=0.2)
+    parser.add_argument("--query-ratio", type=float, default=0.2,
+                        help="share of object_info/bin_info operations")
+    parser.add_argument("--capacity-index", choices=sorted(CAPACITY_INDEXES), default="avl")
+    parser.add_argument("--ordered", action="store_true", help="use the ordered NewAvl object directory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    workload = Workload(args.bins, args.objects, args.capacity, args.size, args.colors,
+                        args.delete_ratio, args.query_ratio, args.seed)
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "python": platform.python_version(),
+        **run(workload, args.capacity_index, args.ordered),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        compare(report, json.loads(Path(args.baseline).read_text()))
@@ -0,0 +1,79 @@
+"""Compare ShardedGCMS with a single GCMS on the same operation stream.
+
+Both run the same add/delete sequence; the placements must match exactly.
+Reports operations per second for each shard count. Placement runs on the
+router, so the shard count is not expected to raise throughput (see
+ShardedGCMS).
+
+    python -m bench.sharded --bins 100000 --operations 200000 --shards 1,2,4
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from sharded import ShardedGCMS
+
+COLORS = list(Color)
+
+
+def operations(bins, count, seed):
+    rng = random.Random(seed)
+    capacities = [(bin_id, rng.randint(500, 5000)) for bin_id in rng.sample(range(10 * bins), bins)]
+    stream = []
+    live = []
+    for object_id in range(count):
+        if live and rng.random() < 0.3:
+            stream.append((live.pop(rng.randrange(len(live))),))
+        else:
+            stream.append((object_id, rng.randint(1, 50), rng.choice(COLORS)))
+            live.append(object_id)
+    return capacities, stream
+
+
+def play(gcms, capacities, stream):
+    gcms.add_bins(capacities)
+    placements = []
+    start = time.perf_counter()
+    for operation in stream:
+        if len(operation) == 1:
+            if gcms.object_info(operation[0]) is not None:
+                gcms.delete_object(operation[0])
+            continue
+        try:
+            placements.append(gcms.add_object(*operation))
+        except NoBinFoundException:
+            placements.append(None)
+    if isinstance(gcms, ShardedGCMS):
+        gcms.flush()  # Waits for the shards to apply everything
+    return placements, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.sharded", description=__doc__.split("\n")[0])
+    parser.add_argument("--bins", type=int, default=100000)
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    capacities, stream = operations(args.bins, args.operations, args.seed)
+    expected, elapsed = play(GCMS(), capacities, stream)
+    print(f"{'shards':>8} {'ops/s':>12}")
+    print(f"{'single':>8} {len(stream) / elapsed:>12.0f}")
+    for shards in (int(s) for s in args.shards.split(",")):
+        with ShardedGCMS(shards) as gcms:
+            placements, elapsed = play(gcms, capacities, stream)
+        if placements != expected:
+            raise AssertionError(f"{shards} shards placed objects differently")
+        print(f"{shards:>8} {len(stream) / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
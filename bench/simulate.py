@@ -0,0 +1,83 @@
+"""Compare Simulation with one GCMS per layout, to find where it pays off.
+
+Every layout gets the same recorded add/delete stream. Simulation replays
+it across all layouts at once; the baseline replays it through one GCMS
+per layout. Rejection counts must match. Simulation's cost per add grows
+with layouts * bins, GCMS's with layouts * log(bins), so the table shows
+the bin count where the speedup drops below 1.
+
+    python -m bench.simulate --layouts 8 --bins 500,2000,5000,20000 --operations 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.workload import Workload
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from simulate import Simulation
+
+
+def record(workload):
+    """The workload's adds and deletes, with deletes picked among all added ids."""
+    placed = []
+    stream = []
+    for name, args in workload.operations(placed):
+        if name == "add_object":
+            placed.append(args[0])
+        if name in ("add_object", "delete_object"):
+            stream.append((name, args))
+    return stream
+
+
+def replay(layout, stream):
+    """Rejections of stream through a GCMS over layout."""
+    gcms = GCMS.from_bins(layout)
+    rejections = 0
+    for name, args in stream:
+        if name == "add_object":
+            try:
+                gcms.add_object(*args)
+            except NoBinFoundException:
+                rejections += 1
+        elif gcms.object_info(args[0]) is not None:
+            gcms.delete_object(*args)
+    return rejections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.simulate", description=__doc__.split("\n")[0])
+    parser.add_argument("--layouts", type=int, default=8)
+    parser.add_argument("--bins", default="500,2000,5000,20000", help="comma-separated bins per layout")
+    parser.add_argument("--operations", type=int, default=5000, help="objects added")
+    parser.add_argument("--capacity", default="uniform:100:1000")
+    parser.add_argument("--size", default="uniform:1:20")
+    parser.add_argument("--delete-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'bins':>8} {'simulate s':>11} {'gcms s':>8} {'speedup':>8}")
+    for bins in (int(n) for n in args.bins.split(",")):
+        workloads = [Workload(bins, args.operations, args.capacity, args.size, delete_ratio=args.delete_ratio,
+                              query_ratio=0.0, seed=args.seed + layout) for layout in range(args.layouts)]
+        layouts = [workload.bin_layout() for workload in workloads]
+        stream = record(workloads[0])
+
+        start = time.perf_counter()
+        simulation = Simulation(layouts).run(stream)
+        simulated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rejections = [replay(layout, stream) for layout in layouts]
+        replayed = time.perf_counter() - start
+
+        if [report["rejections"] for report in simulation.report()] != rejections:
+            raise AssertionError("Simulation and GCMS disagree on rejections")
+        print(f"{bins:>8} {simulated:>11.3f} {replayed:>8.3f} {replayed / simulated:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
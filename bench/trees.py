@@ -0,0 +1,63 @@
+"""Time insertion and deletion in a comparator-based AVLTree against KeyedAVLTree.
+
+Both trees get the same random keys; only how nodes are compared differs.
+
+    python -m bench.trees --nodes 200000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from avl import AVLTree, KeyedAVLTree, comp_by_capacity, compare_objects
+from node import BinNode, CapacityNode
+from object import Color, Object
+
+
+def object_nodes(keys):
+    return [Object(key, 1, Color.BLUE) for key in keys]
+
+
+def capacity_nodes(keys):
+    return [CapacityNode(bin_id, capacity) for capacity, bin_id in keys]
+
+
+def time_tree(tree, nodes, probe):
+    """Seconds to insert every node, then to delete every node again."""
+    start = time.perf_counter()
+    for node in nodes:
+        tree.insertion(node)
+    inserted = time.perf_counter()
+    for node in nodes:
+        tree.delete(probe(node))
+    return inserted - start, time.perf_counter() - inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.trees", description=__doc__.split("\n")[0])
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(args.seed)
+    object_keys = rnd.sample(range(10 * args.nodes), args.nodes)
+    capacity_keys = [(rnd.randint(1, 1000), bin_id) for bin_id in range(args.nodes)]
+    rnd.shuffle(capacity_keys)
+
+    cases = [
+        ("object ids", object_nodes, object_keys, compare_objects, False, lambda node: node),
+        ("(capacity, bin_id)", capacity_nodes, capacity_keys, comp_by_capacity, True,
+         lambda node: BinNode(node.bin_id, node.capacity)),
+    ]
+    print(f"{'keys':<20} {'tree':<14} {'insert us':>10} {'delete us':>10}")
+    for name, make_nodes, keys, comparator, augmented, probe in cases:
+        for label, tree in (("comparator", AVLTree(comparator, augmented)), ("keyed", KeyedAVLTree(augmented))):
+            insert_s, delete_s = time_tree(tree, make_nodes(keys), probe)
+            print(f"{name:<20} {label:<14} {insert_s / len(keys) * 1e6:>10.2f} {delete_s / len(keys) * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Synthetic GCMS workloads: bin layouts, size distributions and operation streams."""
+import random
+
+from object import Color
+
+
+def parse_distribution(spec):
+    """Turn a distribution spec into a function of a random.Random returning an int.
+
+    uniform:LO:HI     integers in [LO, HI]
+    choice:A,B,C      one of the listed values, equally likely
+    choice:A=3,B=1    weighted, as in the color mix
+    lognormal:MU:SIGMA  rounded lognormal variate, at least 1
+    """
+    kind, _, args = spec.partition(":")
+    if kind == "uniform":
+        low, high = (int(value) for value in args.split(":"))
+        return lambda rnd: rnd.randint(low, high)
+    if kind == "choice":
+        values, weights = [], []
+        for part in args.split(","):
+            value, _, weight = part.partition("=")
+            values.append(int(value))
+            weights.append(float(weight) if weight else 1.0)
+        if len(set(weights)) == 1:
+            return lambda rnd: rnd.choice(values)
+        return lambda rnd: rnd.choices(values, weights)[0]
+    if kind == "lognormal":
+        mu, sigma = (float(value) for value in args.split(":"))
+        return lambda rnd: max(1, round(rnd.lognormvariate(mu, sigma)))
+    raise ValueError(f"Unknown distribution {spec!r}")
+
+
+def parse_color_mix(spec):
+    """'BLUE=2,RED=1' -> ([Color.BLUE, Color.RED], [2.0, 1.0]). Unlisted colors get no weight."""
+    colors, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        colors.append(Color[name.strip().upper()])
+        weights.append(float(weight) if weight else 1.0)
+    return colors, weights
+
+
+class Workload:
+    """A reproducible stream of GCMS operations.
+
+    Bins come first, then a mix of object adds, deletes (of objects that
+    were placed) and object_info / bin_info queries. Operations that depend
+    on earlier results, such as which objects can be deleted, are decided
+    as the stream is consumed, so the stream is consumed together with the
+    GCMS it drives.
+    """
+    def __init__(self, bins, objects, capacity="uniform:100:1000", size="uniform:1:20",
+                 colors="BLUE,YELLOW,RED,GREEN", delete_ratio=0.2, query_ratio=0.2, seed=0):
+        self.bins = bins
+        self.objects = objects
+        self.capacity = parse_distribution(capacity)
+        self.size = parse_distribution(size)
+        self.colors, self.color_weights = parse_color_mix(colors)
+        self.delete_ratio = delete_ratio
+        self.query_ratio = query_ratio
+        self.seed = seed
+
+    def bin_layout(self):
+        rnd = random.Random(self.seed)
+        return [(bin_id, self.capacity(rnd)) for bin_id in range(1, self.bins + 1)]
+
+    def operations(self, placed):
+        """Yield (operation, args) tuples. placed is the list of live object ids,
+        maintained by the consumer as adds succeed and deletes run."""
+        rnd = random.Random(self.seed + 1)
+        next_object_id = 1
+        while next_object_id <= self.objects:
+            roll = rnd.random()
+            if roll < self.query_ratio:
+                if placed and rnd.random() < 0.5:
+                    yield "object_info", (rnd.choice(placed),)
+                else:
+                    yield "bin_info", (rnd.randint(1, self.bins),)
+            elif placed and roll < self.query_ratio + self.delete_ratio:
+                index = rnd.randrange(len(placed))
+                # Swap-remove keeps deletes O(1) on the consumer side
+                placed[index], placed[-1] = placed[-1], placed[index]
+                yield "delete_object", (placed.pop(),)
+            else:
+                color = rnd.choices(self.colors, self.color_weights)[0]
+                yield "add_object", (next_object_id, self.size(rnd), color)
+                next_object_id += 1
@@ -1,37 +1,25 @@
-from avl import AVLTree, compare_objects , comp_by_capacity , comp_by_id
+from avl import KeyedAVLTree
 from object import Object , Color
-from node import Node 
+from node import Node , BinNode, ID_OFFSET
+from capacity_index import AVLCapacityIndex
+
+
+def _check_bin_id(bin_id):
+    """Capacity keys hold bin ids in 64 signed bits (see node.capacity_key)."""
+    if not isinstance(bin_id, int):
+        raise TypeError(f"Bin ids must be integers, not {type(bin_id).__name__}")
+    if not -ID_OFFSET <= bin_id < ID_OFFSET:
+        raise ValueError(f"Bin id {bin_id} does not fit in 64 signed bits")
 
 
 class Bin:
+    """A bin record, shared by its id_tree node and its capacity index entry."""
+    __slots__ = ('bin_id', 'capacity', 'objects_tree')
+
     def __init__(self, bin_id, capacity):
         self.bin_id = bin_id
         self.capacity = capacity 
-        self.height = 1 
-        self.left = None
-        self.right = None
-        self.parent = None 
-        self.objects_tree = AVLTree(compare_objects)  # Tree of objects by ID
-
-    def set_left(self, node):
-        self.left = node
-        if node is not None:
-            node.parent = self
-
-    def set_right(self, node):
-        self.right = node
-        if node is not None:
-            node.parent = self
-
-    def update_height(self):
-        left_height = self.left.height if self.left else 0
-        right_height = self.right.height if self.right else 0
-        self.height = 1 + max(left_height, right_height)
-
-    def balance_factor(self):
-        left_height = self.left.height if self.left else 0
-        right_height = self.right.height if self.right else 0
-        return left_height - right_height
+        self.objects_tree = KeyedAVLTree()  # Tree of objects by ID
 
     def add_object(self, obj):
         """Add an object to the AVL tree if there's enough capacity."""
@@ -58,33 +46,104 @@ class Bin:
         self._inorder_traversal(self.objects_tree.root, object_ids)
         return object_ids
 
+    def iter_object_ids(self, start_after=None):
+        """Yield object IDs in order, starting after start_after if given.
+
+        The walk keeps only a stack of O(log n) nodes. If the bin changes
+        while iterating, resume with start_after set to the last ID seen.
+        """
+        stack = []
+        node = self.objects_tree.root
+        while stack or node:
+            # Skip subtrees that lie entirely at or below the cursor
+            while node:
+                if start_after is not None and node.object_id <= start_after:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            yield node.object_id
+            node = node.right
+
+    def iter_objects(self):
+        """Yield the bin's Object nodes in ID order."""
+        stack = []
+        node = self.objects_tree.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node
+            node = node.right
+
     def _inorder_traversal(self, node, object_ids):
-        """In-order traversal to collect object IDs."""
-        if node:
-            self._inorder_traversal(node.left, object_ids)
+        """In-order traversal to collect object IDs, using an explicit stack."""
+        stack = []
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
             object_ids.append(node.object_id)
-            self._inorder_traversal(node.right, object_ids)
+            node = node.right
 
 class AVLManager:
-    def __init__(self):
-        self.id_tree = AVLTree(comp_by_id)
-        self.capacity_tree = AVLTree(comp_by_capacity)
+    def __init__(self, capacity_index=None):
+        self.id_tree = KeyedAVLTree()
+        # Orders bins by (capacity, bin_id); see capacity_index.py
+        self.capacity_index = capacity_index if capacity_index is not None else AVLCapacityIndex()
 
-    def insert_by_id(self, bin_id, capacity):
-        new_node = Bin(bin_id, capacity)
-        self.id_tree.insertion(new_node)
+    def insert_by_id(self, bin):
+        self.id_tree.insertion(BinNode(bin.bin_id, bin=bin))
 
     # Separate insertion for Capacity Tree
-    def insert_by_capacity(self, bin_id, capacity):
-        new_node = Bin(bin_id , capacity)
-        self.capacity_tree.insertion(new_node)
+    def insert_by_capacity(self, bin):
+        self.capacity_index.insert(bin)
 
-    # General insert method that inserts into both trees
+    # General insert method: one Bin record, indexed by both trees
     def insert(self, bin_id, capacity):
-        self.insert_by_id(bin_id, capacity)
-        self.insert_by_capacity(bin_id, capacity)
+        _check_bin_id(bin_id)
+        if self.get(bin_id) is not None:
+            raise ValueError(f"Bin {bin_id} already exists")
+        bin = Bin(bin_id, capacity)
+        # Capacity index first: if it rejects the capacity, no tree holds the bin
+        self.insert_by_capacity(bin)
+        self.insert_by_id(bin)
+        return bin
+
+    def bulk_insert(self, bins):
+        """Insert (bin_id, capacity) pairs, building both trees in one pass if empty.
+
+        Raises ValueError, before inserting any, if an id repeats, already
+        exists or is out of range.
+        """
+        records = {}
+        for bin_id, capacity in bins:
+            _check_bin_id(bin_id)
+            if bin_id in records or self.get(bin_id) is not None:
+                raise ValueError(f"Bin {bin_id} already exists")
+            records[bin_id] = Bin(bin_id, capacity)
+
+        if self.id_tree.root is not None or len(self.capacity_index):
+            for bin in records.values():
+                self.insert_by_capacity(bin)
+                self.insert_by_id(bin)
+            return
+
+        by_id = sorted(records.values(), key=lambda bin: bin.bin_id)
+        by_capacity = sorted(by_id, key=lambda bin: bin.capacity)  # Stable, so ids stay ascending
+        self.capacity_index.build(by_capacity)
+        self.id_tree.build([BinNode(bin.bin_id, bin=bin) for bin in by_id])
+
+    def get(self, bin_id):
+        """Return the Bin record with the given id, or None."""
+        bin_node = self.id_tree.search(self.id_tree.root, bin_id)
+        return bin_node.bin if bin_node else None
 
-        
     def delete_by_id(self, bin_id):
         node_to_delete = self.id_tree.search(self.id_tree.root, bin_id)
         if node_to_delete:
@@ -96,45 +155,90 @@ class AVLManager:
         node_to_delete = self.id_tree.search(self.id_tree.root, bin_id)
         
         if node_to_delete:
-            # Extract capacity from the node to use in capacity_tree deletion
-            capacity = node_to_delete.capacity
+            # Extract capacity from the bin to use in capacity index deletion
+            capacity = node_to_delete.bin.capacity
 
             # Delete from both trees using the stored id and capacity
-            self.delete_by_id(bin_id)
+            self.id_tree.delete(node_to_delete)
             self.delete_by_capacity(bin_id , capacity)
 
     def delete_by_capacity(self, bin_id  , capacity):
-        # Create a temporary node with the same capacity and id
-        temp_node =  Bin(bin_id , capacity)
-        # Use this temporary node to find and delete the correct node in the capacity tree
-        self.capacity_tree.delete(temp_node)
+        self.capacity_index.delete(bin_id, capacity)
 
+    def update_capacity(self, bin, new_capacity):
+        """Re-key a bin in the capacity index, leaving its id_tree node in place."""
+        # Only the capacity index is ordered by capacity, so only it has to move
+        self.delete_by_capacity(bin.bin_id, bin.capacity)
+        bin.capacity = new_capacity
+        self.insert_by_capacity(bin)
+        return bin
 
 
     def add_object(self,bin ,bin_id ,obj):
         
-        bin_node1 = self.id_tree.search(self.id_tree.root, bin_id)
+        bin_node1 = self.get(bin_id)
         bin_node1.add_object(obj) 
  
 
     def remove_object(self , bin_id , obj_id):
 
-        bin_node1 = self.id_tree.search(self.id_tree.root, bin_id)
+        bin_node1 = self.get(bin_id)
         bin_node1.remove_object(obj_id)
 
 
 
 class NewAvl:
+    """Ordered object_id -> bin_id directory, for GCMS(directory=NewAvl()).
+
+    Slower than the default ObjectDirectory, but supports range scans.
+    """
+    ordered = True
+
     def __init__(self):
-        self.my_tree = AVLTree(compare_objects)
+        self.my_tree = KeyedAVLTree()
+        self.count = 0
 
 
     def insert(self , object_id , bin_id):
         new_node = Node(object_id , bin_id)
         self.my_tree.insertion(new_node) 
+        self.count += 1
     
     def delete(self , object_id):
-
-        self.my_tree.delete_newobject(object_id) 
-
-
+        if self.my_tree.search_object(self.my_tree.root, object_id):
+            self.my_tree.delete_newobject(object_id) 
+            self.count -= 1
+
+    def build(self, pairs):
+        """Load (object_id, bin_id) pairs, sorted by object_id, into an empty directory."""
+        nodes = [Node(object_id, bin_id) for object_id, bin_id in pairs]
+        self.my_tree.build(nodes)
+        self.count = len(nodes)
+
+    def get(self, object_id):
+        """Return the bin id holding object_id, or None."""
+        node = self.my_tree.search_object(self.my_tree.root, object_id)
+        return node.bin_id if node else None
+
+    def __len__(self):
+        return self.count
+
+    def items(self, start=None, stop=None):
+        """(object_id, bin_id) pairs with start <= object_id < stop, in id order."""
+        stack = []
+        current = self.my_tree.root
+        while stack or current:
+            # Skip left subtrees that lie entirely below start
+            while current:
+                if start is not None and current.object_id < start:
+                    current = current.right
+                else:
+                    stack.append(current)
+                    current = current.left
+            if not stack:
+                break
+            current = stack.pop()
+            if stop is not None and current.object_id >= stop:
+                return
+            yield current.object_id, current.bin_id
+            current = current.right
@@ -0,0 +1,753 @@
+from bisect import bisect_left, bisect_right, insort
+
+from avl import KeyedAVLTree
+from node import BinNode, CapacityNode, capacity_key, ID_OFFSET
+
+# Bin id bounds for ceiling/floor probes that should match any id
+LOWEST_ID = float("-inf")
+HIGHEST_ID = float("inf")
+
+
+def _probe_key(capacity, bin_id):
+    """capacity_key, also for the LOWEST_ID and HIGHEST_ID bounds."""
+    if bin_id == LOWEST_ID:
+        return capacity << 64
+    if bin_id == HIGHEST_ID:
+        return ((capacity + 1) << 64) - 1
+    return capacity_key(capacity, bin_id)
+
+
+def _bin_id_of(key):
+    """The bin_id packed into a capacity_key."""
+    return (key & 0xFFFFFFFFFFFFFFFF) - ID_OFFSET
+
+
+class AVLCapacityIndex:
+    """Capacity index over (capacity, bin_id) keys, one AVL node per bin.
+
+    Every capacity index answers ceiling, floor, successor, predecessor
+    and max on those keys and returns Bin records; GCMS builds the Color
+    policies out of ceiling, floor and max. The engines in this module are
+    interchangeable: GCMS(capacity_index=...) takes any of them.
+
+    With order_statistics, nodes also carry subtree counts and capacity
+    totals, so total_capacity, count_at_least and kth_largest take O(log n).
+    Without it, updates are cheaper and those queries walk the whole tree.
+    """
+    __slots__ = ('tree', 'node_class')
+
+    def __init__(self, order_statistics=True):
+        self.tree = KeyedAVLTree(augmented=order_statistics)
+        self.node_class = CapacityNode if order_statistics else BinNode
+
+    def __len__(self):
+        return self.tree.size
+
+    def insert(self, bin):
+        self.tree.insertion(self.node_class(bin.bin_id, bin.capacity, bin))
+
+    def delete(self, bin_id, capacity):
+        self.tree.delete(BinNode(bin_id, capacity))
+
+    def build(self, bins):
+        """Load bins sorted by (capacity, bin_id) into an empty index."""
+        node_class = self.node_class
+        self.tree.build([node_class(bin.bin_id, bin.capacity, bin) for bin in bins])
+
+    def ceiling(self, capacity, bin_id):
+        """The bin with the smallest key >= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        current = self.tree.root
+        suitable = None
+        while current:
+            if current.key >= key:
+                suitable = current
+                current = current.left
+            else:
+                current = current.right
+        return suitable.bin if suitable else None
+
+    def floor(self, capacity, bin_id):
+        """The bin with the largest key <= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        current = self.tree.root
+        suitable = None
+        while current:
+            if current.key <= key:
+                suitable = current
+                current = current.right
+            else:
+                current = current.left
+        return suitable.bin if suitable else None
+
+    def successor(self, capacity, bin_id):
+        """The bin right after (capacity, bin_id) in key order, or None."""
+        return self.ceiling(capacity, bin_id + 1)
+
+    def predecessor(self, capacity, bin_id):
+        """The bin right before (capacity, bin_id) in key order, or None."""
+        return self.floor(capacity, bin_id - 1)
+
+    def max(self):
+        if self.tree.root is None:
+            return None
+        return self.tree.rightmost(self.tree.root).bin
+
+    def _descending(self):
+        """Nodes from the largest key down, for indexes without order statistics."""
+        stack = []
+        current = self.tree.root
+        while stack or current:
+            while current:
+                stack.append(current)
+                current = current.right
+            current = stack.pop()
+            yield current
+            current = current.left
+
+    def total_capacity(self):
+        if not self.tree.augmented:
+            return sum(node.capacity for node in self._descending())
+        return self.tree.root.total if self.tree.root else 0
+
+    def count_at_least(self, capacity):
+        """Number of bins with capacity >= capacity."""
+        if not self.tree.augmented:
+            count = 0
+            for node in self._descending():
+                if node.capacity < capacity:
+                    break
+                count += 1
+            return count
+
+        current = self.tree.root
+        count = 0
+        while current:
+            if current.capacity >= capacity:
+                count += 1 + (current.right.count if current.right else 0)
+                current = current.left
+            else:
+                current = current.right
+        return count
+
+    def kth_largest(self, k):
+        """The k-th largest bin by (capacity, bin_id), counting from 1, or None."""
+        if not self.tree.augmented:
+            if k < 1:
+                return None
+            for rank, node in enumerate(self._descending(), 1):
+                if rank == k:
+                    return node.bin
+            return None
+
+        current = self.tree.root
+        while current:
+            right_count = current.right.count if current.right else 0
+            if k <= right_count:
+                current = current.right
+            elif k == right_count + 1:
+                return current.bin
+            else:
+                k -= right_count + 1
+                current = current.left
+        return None
+
+
+class CapacityBucket:
+    """All bins sharing one capacity, as a sorted list of their ids.
+
+    count and total aggregate bins and capacity over the bucket's subtree.
+    """
+    __slots__ = ('capacity', 'key', 'bin_ids', 'left', 'right', 'parent', 'height', 'count', 'total')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.key = capacity
+        self.bin_ids = []
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.height = 1
+        self.count = 0
+        self.total = 0
+
+    def set_left(self, node):
+        self.left = node
+        if node is not None:
+            node.parent = self
+
+    def set_right(self, node):
+        self.right = node
+        if node is not None:
+            node.parent = self
+
+    def update_height(self):
+        left, right = self.left, self.right
+        left_height = left.height if left else 0
+        right_height = right.height if right else 0
+        self.height = 1 + max(left_height, right_height)
+        own = len(self.bin_ids)
+        self.count = own + (left.count if left else 0) + (right.count if right else 0)
+        self.total = self.capacity * own + (left.total if left else 0) + (right.total if right else 0)
+
+    def balance_factor(self):
+        left_height = self.left.height if self.left else 0
+        right_height = self.right.height if self.right else 0
+        return left_height - right_height
+
+
+class BucketCapacityIndex:
+    """Capacity index keyed by distinct capacity.
+
+    An AVL tree holds one CapacityBucket per distinct capacity, and each
+    bucket keeps its bin ids sorted, so its min and max id are at the ends.
+    Queries cost O(log k) for k distinct capacities plus a bisect within a
+    bucket, which beats a per-bin tree when capacities repeat a lot.
+    """
+    __slots__ = ('tree', 'bins')
+
+    def __init__(self):
+        self.tree = KeyedAVLTree(augmented=True)
+        self.bins = {}  # bin_id -> Bin
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _bucket(self, capacity):
+        current = self.tree.root
+        while current is not None:
+            if current.capacity == capacity:
+                return current
+            current = current.left if capacity < current.capacity else current.right
+        return None
+
+    def _bucket_at_least(self, capacity, strict=False):
+        """The bucket with the smallest capacity >= (or >, if strict) capacity."""
+        current = self.tree.root
+        suitable = None
+        while current:
+            if current.capacity > capacity or (not strict and current.capacity == capacity):
+                suitable = current
+                current = current.left
+            else:
+                current = current.right
+        return suitable
+
+    def _bucket_at_most(self, capacity, strict=False):
+        """The bucket with the largest capacity <= (or <, if strict) capacity."""
+        current = self.tree.root
+        suitable = None
+        while current:
+            if current.capacity < capacity or (not strict and current.capacity == capacity):
+                suitable = current
+                current = current.right
+            else:
+                current = current.left
+        return suitable
+
+    def insert(self, bin):
+        bucket = self._bucket(bin.capacity)
+        if bucket is None:
+            bucket = CapacityBucket(bin.capacity)
+            bucket.bin_ids.append(bin.bin_id)
+            self.tree.insertion(bucket)
+        else:
+            insort(bucket.bin_ids, bin.bin_id)
+            self.tree.add_to_path(bucket, 1, bin.capacity)
+        self.bins[bin.bin_id] = bin
+
+    def delete(self, bin_id, capacity):
+        bucket = self._bucket(capacity)
+        if bucket is None:
+            return
+        bin_ids = bucket.bin_ids
+        index = bisect_left(bin_ids, bin_id)
+        if index == len(bin_ids) or bin_ids[index] != bin_id:
+            return
+        del self.bins[bin_id]
+        if len(bin_ids) > 1:
+            del bin_ids[index]
+            self.tree.add_to_path(bucket, -1, -capacity)
+        else:
+            self.tree.delete(bucket)
+
+    def build(self, bins):
+        """Load bins sorted by (capacity, bin_id) into an empty index."""
+        buckets = []
+        for bin in bins:
+            if not buckets or buckets[-1].capacity != bin.capacity:
+                buckets.append(CapacityBucket(bin.capacity))
+            buckets[-1].bin_ids.append(bin.bin_id)
+            self.bins[bin.bin_id] = bin
+        self.tree.build(buckets)
+
+    def ceiling(self, capacity, bin_id):
+        """The bin with the smallest key >= (capacity, bin_id), or None."""
+        bucket = self._bucket_at_least(capacity)
+        if bucket is None:
+            return None
+        if bucket.capacity == capacity:
+            index = bisect_left(bucket.bin_ids, bin_id)
+            if index < len(bucket.bin_ids):
+                return self.bins[bucket.bin_ids[index]]
+            bucket = self._bucket_at_least(capacity, strict=True)
+            if bucket is None:
+                return None
+        return self.bins[bucket.bin_ids[0]]
+
+    def floor(self, capacity, bin_id):
+        """The bin with the largest key <= (capacity, bin_id), or None."""
+        bucket = self._bucket_at_most(capacity)
+        if bucket is None:
+            return None
+        if bucket.capacity == capacity:
+            index = bisect_right(bucket.bin_ids, bin_id)
+            if index > 0:
+                return self.bins[bucket.bin_ids[index - 1]]
+            bucket = self._bucket_at_most(capacity, strict=True)
+            if bucket is None:
+                return None
+        return self.bins[bucket.bin_ids[-1]]
+
+    def successor(self, capacity, bin_id):
+        """The bin right after (capacity, bin_id) in key order, or None."""
+        return self.ceiling(capacity, bin_id + 1)
+
+    def predecessor(self, capacity, bin_id):
+        """The bin right before (capacity, bin_id) in key order, or None."""
+        return self.floor(capacity, bin_id - 1)
+
+    def max(self):
+        if self.tree.root is None:
+            return None
+        return self.bins[self.tree.rightmost(self.tree.root).bin_ids[-1]]
+
+    def total_capacity(self):
+        return self.tree.root.total if self.tree.root else 0
+
+    def count_at_least(self, capacity):
+        """Number of bins with capacity >= capacity."""
+        current = self.tree.root
+        count = 0
+        while current:
+            if current.capacity >= capacity:
+                count += len(current.bin_ids) + (current.right.count if current.right else 0)
+                current = current.left
+            else:
+                current = current.right
+        return count
+
+    def kth_largest(self, k):
+        """The k-th largest bin by (capacity, bin_id), counting from 1, or None."""
+        current = self.tree.root
+        while current:
+            right_count = current.right.count if current.right else 0
+            own = len(current.bin_ids)
+            if k <= right_count:
+                current = current.right
+            elif k <= right_count + own:
+                return self.bins[current.bin_ids[own - (k - right_count)]]
+            else:
+                k -= right_count + own
+                current = current.left
+        return None
+
+
+class _BTreeNode:
+    """B+ tree node. Leaves hold sorted capacity keys and are linked both ways;
+    internal nodes hold children plus separators, where keys[i] is the
+    smallest key under children[i + 1]. count and total cover the subtree."""
+    __slots__ = ('keys', 'children', 'next', 'prev', 'count', 'total')
+
+    def __init__(self, keys, children=None):
+        self.keys = keys
+        self.children = children
+        self.next = None
+        self.prev = None
+        self.recount()
+
+    def recount(self):
+        if self.children is None:
+            self.count = len(self.keys)
+            self.total = sum(key >> 64 for key in self.keys)
+        else:
+            self.count = sum(child.count for child in self.children)
+            self.total = sum(child.total for child in self.children)
+
+
+class BTreeCapacityIndex:
+    """Capacity index in a high-fanout B+ tree over packed capacity keys.
+
+    A node holds up to fanout keys or children in plain lists, so a lookup
+    touches log_fanout(n) nodes and does one bisect in each, where the AVL
+    index follows about 1.44 log2(n) pointers. Subtree counts and totals
+    make the order statistics O(fanout * log_fanout(n)).
+    """
+    __slots__ = ('root', 'bins', 'fanout')
+
+    def __init__(self, fanout=64):
+        self.fanout = fanout
+        self.root = _BTreeNode([])
+        self.bins = {}  # bin_id -> Bin
+
+    def __len__(self):
+        return len(self.bins)
+
+    def _descend(self, key):
+        """The leaf where key belongs, and the (node, child index) pairs above it."""
+        path = []
+        node = self.root
+        while node.children is not None:
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        return node, path
+
+    def insert(self, bin):
+        if bin.bin_id in self.bins:
+            return
+        self.bins[bin.bin_id] = bin
+        key = capacity_key(bin.capacity, bin.bin_id)
+        leaf, path = self._descend(key)
+        insort(leaf.keys, key)
+        leaf.count += 1
+        leaf.total += bin.capacity
+        for node, _ in path:
+            node.count += 1
+            node.total += bin.capacity
+        if len(leaf.keys) > self.fanout:
+            self._split(leaf, path)
+
+    def _split(self, node, path):
+        middle = len(node.keys) // 2
+        if node.children is None:
+            sibling = _BTreeNode(node.keys[middle:])
+            separator = sibling.keys[0]
+            del node.keys[middle:]
+            sibling.next, sibling.prev = node.next, node
+            if node.next is not None:
+                node.next.prev = sibling
+            node.next = sibling
+        else:
+            # The middle separator moves up instead of staying in either half
+            separator = node.keys[middle]
+            sibling = _BTreeNode(node.keys[middle + 1:], node.children[middle + 1:])
+            del node.keys[middle:]
+            del node.children[middle + 1:]
+        node.recount()
+
+        if not path:
+            self.root = _BTreeNode([separator], [node, sibling])
+            return
+        parent, index = path.pop()
+        parent.keys.insert(index, separator)
+        parent.children.insert(index + 1, sibling)
+        if len(parent.children) > self.fanout:
+            self._split(parent, path)
+
+    def delete(self, bin_id, capacity):
+        bin = self.bins.get(bin_id)
+        if bin is None:
+            return
+        key = capacity_key(capacity, bin_id)
+        leaf, path = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index == len(leaf.keys) or leaf.keys[index] != key:
+            return
+        del self.bins[bin_id]
+        del leaf.keys[index]
+        leaf.count -= 1
+        leaf.total -= capacity
+        for node, _ in path:
+            node.count -= 1
+            node.total -= capacity
+        self._rebalance(leaf, path)
+
+    def _rebalance(self, node, path):
+        """Refill or merge node if it fell below a quarter full, then fix its parent.
+
+        Internal nodes below the root keep at least two children, leaves at
+        least one key.
+        """
+        if node.children is None:
+            size, minimum = len(node.keys), max(1, self.fanout // 4)
+        else:
+            size, minimum = len(node.children), max(2, self.fanout // 4)
+        if not path:
+            if node.children is not None and size == 1:
+                self.root = node.children[0]  # Drop a root with one child
+            return
+        if size >= minimum:
+            return
+
+        parent, index = path.pop()
+        if index > 0:
+            left, right, separator_index = parent.children[index - 1], node, index - 1
+        else:
+            left, right, separator_index = node, parent.children[1], 0
+        separator = parent.keys[separator_index]
+
+        if node.children is None:
+            keys = left.keys + right.keys
+            merge = len(keys) <= self.fanout
+            if merge:
+                left.keys = keys
+                left.next = right.next
+                if right.next is not None:
+                    right.next.prev = left
+            else:
+                middle = len(keys) // 2
+                left.keys, right.keys = keys[:middle], keys[middle:]
+                parent.keys[separator_index] = right.keys[0]
+        else:
+            keys = left.keys + [separator] + right.keys
+            children = left.children + right.children
+            merge = len(children) <= self.fanout
+            if merge:
+                left.keys, left.children = keys, children
+            else:
+                middle = len(children) // 2
+                left.keys, left.children = keys[:middle - 1], children[:middle]
+                right.keys, right.children = keys[middle:], children[middle:]
+                parent.keys[separator_index] = keys[middle - 1]
+
+        left.recount()
+        if merge:
+            del parent.keys[separator_index]
+            del parent.children[separator_index + 1]
+            self._rebalance(parent, path)
+        else:
+            right.recount()
+
+    def build(self, bins):
+        """Load bins sorted by (capacity, bin_id) into an empty index."""
+        keys = []
+        for bin in bins:
+            self.bins[bin.bin_id] = bin
+            keys.append(capacity_key(bin.capacity, bin.bin_id))
+        if not keys:
+            return
+        step = max(2, self.fanout * 3 // 4)  # Leave room to grow before splitting
+        level = [_BTreeNode(keys[start:start + step]) for start in range(0, len(keys), step)]
+        for left, right in zip(level, level[1:]):
+            left.next, right.prev = right, left
+        # Each level's first keys become the separators of the level above
+        firsts = [node.keys[0] for node in level]
+        while len(level) > 1:
+            parents, parent_firsts = [], []
+            for start in range(0, len(level), step):
+                children = level[start:start + step]
+                if len(children) == 1 and parents:
+                    # Never leave a lone child; give it to the previous parent
+                    parents[-1].keys.append(firsts[start])
+                    parents[-1].children.append(children[0])
+                    parents[-1].recount()
+                    continue
+                parents.append(_BTreeNode(firsts[start + 1:start + len(children)], children))
+                parent_firsts.append(firsts[start])
+            level, firsts = parents, parent_firsts
+        self.root = level[0]
+
+    def _bin(self, key):
+        return self.bins[_bin_id_of(key)]
+
+    def ceiling(self, capacity, bin_id):
+        """The bin with the smallest key >= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        leaf, _ = self._descend(key)
+        index = bisect_left(leaf.keys, key)
+        if index == len(leaf.keys):
+            leaf, index = leaf.next, 0
+            if leaf is None:
+                return None
+        return self._bin(leaf.keys[index])
+
+    def floor(self, capacity, bin_id):
+        """The bin with the largest key <= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        leaf, _ = self._descend(key)
+        index = bisect_right(leaf.keys, key)
+        if index == 0:
+            leaf = leaf.prev
+            if leaf is None:
+                return None
+            index = len(leaf.keys)
+        return self._bin(leaf.keys[index - 1])
+
+    def successor(self, capacity, bin_id):
+        """The bin right after (capacity, bin_id) in key order, or None."""
+        return self.ceiling(capacity, bin_id + 1)
+
+    def predecessor(self, capacity, bin_id):
+        """The bin right before (capacity, bin_id) in key order, or None."""
+        return self.floor(capacity, bin_id - 1)
+
+    def max(self):
+        node = self.root
+        while node.children is not None:
+            node = node.children[-1]
+        return self._bin(node.keys[-1]) if node.keys else None
+
+    def total_capacity(self):
+        return self.root.total
+
+    def count_at_least(self, capacity):
+        """Number of bins with capacity >= capacity."""
+        key = capacity << 64
+        count = 0
+        node = self.root
+        while node.children is not None:
+            index = bisect_right(node.keys, key)
+            count += sum(child.count for child in node.children[index + 1:])
+            node = node.children[index]
+        return count + len(node.keys) - bisect_left(node.keys, key)
+
+    def kth_largest(self, k):
+        """The k-th largest bin by (capacity, bin_id), counting from 1, or None."""
+        if k < 1 or k > self.root.count:
+            return None
+        node = self.root
+        while node.children is not None:
+            for child in reversed(node.children):
+                if k <= child.count:
+                    node = child
+                    break
+                k -= child.count
+        return self._bin(node.keys[-k])
+
+
+class BlockCapacityIndex:
+    """Capacity index in a list of sorted blocks of packed capacity keys.
+
+    Blocks hold at most 2 * load keys, and maxes[i] is the largest key in
+    blocks[i]. A lookup bisects maxes and then one block, and an update
+    shifts at most one block, so inserts and deletes are mostly memmoves
+    inside C lists instead of tree rebalancing. count_at_least and
+    kth_largest walk block lengths, O(n / load).
+    """
+    __slots__ = ('blocks', 'maxes', 'bins', 'total', 'load')
+
+    def __init__(self, load=512):
+        self.load = load
+        self.blocks = []
+        self.maxes = []
+        self.bins = {}  # bin_id -> Bin
+        self.total = 0
+
+    def __len__(self):
+        return len(self.bins)
+
+    def insert(self, bin):
+        if bin.bin_id in self.bins:
+            return
+        self.bins[bin.bin_id] = bin
+        self.total += bin.capacity
+        key = capacity_key(bin.capacity, bin.bin_id)
+        blocks, maxes = self.blocks, self.maxes
+        if not blocks:
+            blocks.append([key])
+            maxes.append(key)
+            return
+        index = bisect_left(maxes, key)
+        if index == len(maxes):
+            index -= 1
+            maxes[index] = key
+        block = blocks[index]
+        insort(block, key)
+        if len(block) > 2 * self.load:
+            # Split in half
+            blocks.insert(index + 1, block[self.load:])
+            del block[self.load:]
+            maxes.insert(index, block[-1])
+
+    def delete(self, bin_id, capacity):
+        if bin_id not in self.bins:
+            return
+        key = capacity_key(capacity, bin_id)
+        maxes = self.maxes
+        index = bisect_left(maxes, key)
+        if index == len(maxes):
+            return
+        block = self.blocks[index]
+        position = bisect_left(block, key)
+        if block[position] != key:
+            return
+        del self.bins[bin_id]
+        self.total -= capacity
+        del block[position]
+        if not block:
+            del self.blocks[index]
+            del maxes[index]
+        elif position == len(block):
+            maxes[index] = block[-1]
+
+    def build(self, bins):
+        """Load bins sorted by (capacity, bin_id) into an empty index."""
+        keys = []
+        for bin in bins:
+            self.bins[bin.bin_id] = bin
+            self.total += bin.capacity
+            keys.append(capacity_key(bin.capacity, bin.bin_id))
+        load = self.load
+        self.blocks = [keys[start:start + load] for start in range(0, len(keys), load)]
+        self.maxes = [block[-1] for block in self.blocks]
+
+    def _bin(self, key):
+        return self.bins[_bin_id_of(key)]
+
+    def ceiling(self, capacity, bin_id):
+        """The bin with the smallest key >= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        index = bisect_left(self.maxes, key)
+        if index == len(self.maxes):
+            return None
+        block = self.blocks[index]
+        return self._bin(block[bisect_left(block, key)])
+
+    def floor(self, capacity, bin_id):
+        """The bin with the largest key <= (capacity, bin_id), or None."""
+        key = _probe_key(capacity, bin_id)
+        index = bisect_left(self.maxes, key)
+        if index < len(self.maxes):
+            block = self.blocks[index]
+            position = bisect_right(block, key)
+            if position:
+                return self._bin(block[position - 1])
+        # Every key in blocks[index] is above key; the answer ends the block before
+        return self._bin(self.maxes[index - 1]) if index else None
+
+    def successor(self, capacity, bin_id):
+        """The bin right after (capacity, bin_id) in key order, or None."""
+        return self.ceiling(capacity, bin_id + 1)
+
+    def predecessor(self, capacity, bin_id):
+        """The bin right before (capacity, bin_id) in key order, or None."""
+        return self.floor(capacity, bin_id - 1)
+
+    def max(self):
+        return self._bin(self.maxes[-1]) if self.maxes else None
+
+    def total_capacity(self):
+        return self.total
+
+    def count_at_least(self, capacity):
+        """Number of bins with capacity >= capacity."""
+        key = capacity << 64
+        index = bisect_left(self.maxes, key)
+        if index == len(self.maxes):
+            return 0
+        block = self.blocks[index]
+        count = len(block) - bisect_left(block, key)
+        for block in self.blocks[index + 1:]:
+            count += len(block)
+        return count
+
+    def kth_largest(self, k):
+        """The k-th largest bin by (capacity, bin_id), counting from 1, or None."""
+        if k < 1:
+            return None
+        for block in reversed(self.blocks):
+            if k <= len(block):
+                return self._bin(block[-k])
+            k -= len(block)
+        return None
@@ -0,0 +1,31 @@
+class ObjectDirectory:
+    """Default object_id -> bin_id directory, backed by a dict.
+
+    Lookups and deletes are O(1) and each entry is a single dict slot. It has
+    no ordering; use NewAvl as the directory when range scans are needed.
+    """
+    ordered = False
+
+    def __init__(self):
+        self.bins = {}
+
+    def insert(self, object_id, bin_id):
+        self.bins[object_id] = bin_id
+
+    def delete(self, object_id):
+        self.bins.pop(object_id, None)
+
+    def build(self, pairs):
+        """Load (object_id, bin_id) pairs into an empty directory."""
+        self.bins = dict(pairs)
+
+    def get(self, object_id):
+        """Return the bin id holding object_id, or None."""
+        return self.bins.get(object_id)
+
+    def __len__(self):
+        return len(self.bins)
+
+    def items(self):
+        """(object_id, bin_id) pairs in no particular order."""
+        return iter(self.bins.items())
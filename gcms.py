@@ -1,17 +1,247 @@
-from bin import Bin, AVLManager, NewAvl
+import os
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from itertools import islice
+
+from bin import AVLManager
 from object import Object, Color
 from exceptions import NoBinFoundException
+from directory import ObjectDirectory
+from capacity_index import LOWEST_ID, HIGHEST_ID
+from node import as_capacity
+import snapshot
+import oplog
+import instrument
 
 class GCMS:
-    def __init__(self):
-        self.bin_manager = AVLManager()
-        self.new_tree = NewAvl()
+    # Bins a batch may hold out of the capacity index before it re-keys them early
+    max_pending = 1024
+    # Operations timed while stats are enabled
+    timed_operations = ("add_bin", "add_object", "delete_object", "object_info", "bin_info")
+
+    def __init__(self, directory=None, capacity_index=None):
+        # capacity_index: AVLCapacityIndex() by default, BucketCapacityIndex()
+        # when bin capacities come from a small set of values, or the
+        # cheaper-to-update BTreeCapacityIndex() / BlockCapacityIndex()
+        self.bin_manager = AVLManager(capacity_index)
+        # object_id -> bin_id; pass NewAvl() for an ordered, range-scannable directory
+        self.directory = directory if directory is not None else ObjectDirectory()
+        # bin_id -> Bin for bins whose capacity index entry is deferred by batch(),
+        # plus their (capacity, bin_id) keys kept sorted for bisection
+        self._pending = None
+        self._pending_keys = []
+        # Write-ahead operation log and checkpoint target, attached by open()
+        self.log = None
+        self.snapshot_path = None
+        self.checkpoint_bytes = None
+        # Set by enable_stats
+        self._stats_enabled = False
+        self._exporter = None
+        self._timed_count = 0
+
+    @classmethod
+    def from_bins(cls, bins, directory=None, capacity_index=None):
+        """Build a GCMS over (bin_id, capacity) pairs, bulk-loading both bin indexes."""
+        gcms = cls(directory, capacity_index)
+        gcms.add_bins(bins)
+        return gcms
+
+    @classmethod
+    def load(cls, path, directory=None, capacity_index=None):
+        """Rebuild a GCMS from a snapshot written by save()."""
+        gcms = cls(directory, capacity_index)
+        snapshot.load(gcms, path)
+        return gcms
+
+    @classmethod
+    def open(cls, snapshot_path, log_path, directory=None, capacity_index=None,
+             sync="batch", group_size=512, max_delay=0.01, checkpoint_bytes=64 << 20):
+        """Recover a durable GCMS: load the last snapshot, replay the log on top.
+
+        Every later add_bin/add_object/delete_object is appended to the log
+        (see oplog.OperationLog for sync, group_size and max_delay). Once the
+        log grows past checkpoint_bytes it is folded into a new snapshot.
+        """
+        gcms = cls(directory, capacity_index)
+        sequence = snapshot.load(gcms, snapshot_path) if os.path.exists(snapshot_path) else 0
+
+        if os.path.exists(log_path):
+            base, records, _ = oplog.read(log_path)
+            if base > sequence:
+                raise ValueError(f"Log starts at {base}, after snapshot sequence {sequence}")
+            with gcms.batch():
+                for operation, a, b, c in records[sequence - base:]:
+                    gcms._replay(operation, a, b, c)
+
+        gcms.log = oplog.OperationLog(log_path, sync, group_size, max_delay, base=sequence)
+        if gcms.log.sequence < sequence:
+            # The log lost records the snapshot already holds (sync="none" and a
+            # crash after a checkpoint); numbering on from its end would reuse
+            # sequence numbers that the next recovery skips
+            gcms.log.reset(sequence)
+        gcms.snapshot_path = snapshot_path
+        gcms.checkpoint_bytes = checkpoint_bytes
+        return gcms
+
+    def _replay(self, operation, a, b, c):
+        if operation == oplog.ADD_BIN:
+            self.add_bin(a, b)
+        elif operation == oplog.ADD_OBJECT:
+            self.add_object(a, b, Color(c))
+        elif operation == oplog.DELETE_OBJECT:
+            self.delete_object(a)
+        elif operation == oplog.RESIZE_BIN:
+            self.resize_bin(a, b)
+        elif operation == oplog.REMOVE_BIN:
+            self.remove_bin(a, migrate=bool(c))
+        elif operation == oplog.MOVE_OBJECT:
+            self.move_object(a, b)
+        else:
+            raise ValueError(f"Unknown log operation {operation}")
+
+    def _log(self, operation, a, b=0, c=0):
+        log = self.log
+        log.append(operation, a, b, c)
+        if log.size >= self.checkpoint_bytes:
+            self.checkpoint()
+
+    def commit(self):
+        """Make every operation so far durable, without waiting for the group to fill."""
+        if self.log is not None:
+            self.log.commit()
+
+    def checkpoint(self):
+        """Snapshot the current state and restart the log empty from there."""
+        sequence = self.log.sequence
+        self.log.commit()
+        temporary = self.snapshot_path + ".tmp"
+        snapshot.save(self, temporary, sequence)
+        with open(temporary, "rb") as file:
+            os.fsync(file.fileno())
+        os.replace(temporary, self.snapshot_path)
+        # A crash before this line leaves the old log, whose records up to
+        # sequence are skipped on recovery
+        self.log.reset(sequence)
+
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+    def save(self, path):
+        """Write all bins and objects to a compact binary snapshot (see snapshot.py)."""
+        snapshot.save(self, path, self.log.sequence if self.log is not None else 0)
 
     def add_bin(self, bin_id, capacity):
+        """Add an empty bin.
+
+        Raises ValueError if bin_id is taken or outside 64 signed bits, and
+        TypeError if capacity is not an integer.
+        """
+        capacity = as_capacity(capacity)
         self.bin_manager.insert(bin_id, capacity)
+        if self.log is not None:
+            self._log(oplog.ADD_BIN, bin_id, capacity)
+
+    def add_bins(self, bins):
+        """Add (bin_id, capacity) pairs; into an empty GCMS this is a sort plus an O(n) build.
+
+        Raises ValueError, adding none of them, if an id repeats, is taken or
+        is outside 64 signed bits, or TypeError if a capacity is not an integer.
+        """
+        bins = [(bin_id, as_capacity(capacity)) for bin_id, capacity in bins]
+        self.bin_manager.bulk_insert(bins)
+        if self.log is not None:
+            for bin_id, capacity in bins:
+                self._log(oplog.ADD_BIN, bin_id, capacity)
+
+    def resize_bin(self, bin_id, new_capacity):
+        """Change a bin's total capacity; its remaining capacity moves by the same amount.
+
+        Raises ValueError if the bin's objects no longer fit.
+        """
+        new_capacity = as_capacity(new_capacity)
+        bin = self.bin_manager.get(bin_id)
+        if bin is None:
+            raise KeyError(bin_id)
+        used = sum(obj.size for obj in bin.iter_objects())
+        if used > new_capacity:
+            raise ValueError(f"Bin {bin_id} holds {used}, more than {new_capacity}")
+        self._set_capacity(bin, new_capacity - used)
+        if self.log is not None:
+            self._log(oplog.RESIZE_BIN, bin_id, new_capacity)
+
+    def remove_bin(self, bin_id, migrate=True):
+        """Remove a bin. With migrate, its objects are first re-placed by their
+        color policies, in ID order, as one batch; otherwise they are deleted.
+
+        If some object fits nowhere else, NoBinFoundException is raised and
+        nothing changes. Only the moved objects and the bins they land in are
+        touched; the moves are re-keyed together when the batch ends.
+        """
+        bin = self.bin_manager.get(bin_id)
+        if bin is None:
+            raise KeyError(bin_id)
+        objects = list(bin.iter_objects())
+        directory = self.directory
+        with self.batch():
+            # The bin must not compete for its own objects
+            self._flush_pending()
+            self.bin_manager.delete_by_capacity(bin_id, bin.capacity)
+            if migrate:
+                targets = []
+                for obj in objects:
+                    target = self._find_suitable_bin(obj)
+                    if target is None:
+                        for moved, taken in zip(objects, targets):
+                            self._set_capacity(taken, taken.capacity + moved.size)
+                        self.bin_manager.insert_by_capacity(bin)
+                        raise NoBinFoundException()
+                    self._set_capacity(target, target.capacity - obj.size)
+                    targets.append(target)
+                for obj, target in zip(objects, targets):
+                    self._store(target, obj)
+                    directory.delete(obj.object_id)
+                    directory.insert(obj.object_id, target.bin_id)
+            else:
+                for obj in objects:
+                    directory.delete(obj.object_id)
+            self.bin_manager.delete_by_id(bin_id)
+        if self.log is not None:
+            self._log(oplog.REMOVE_BIN, bin_id, 0, int(migrate))
+
+    def move_object(self, object_id, bin_id):
+        """Move a placed object into another bin, bypassing the color policies.
+
+        Raises KeyError for an unknown object or bin, ValueError if the
+        object does not fit.
+        """
+        source = self._bin_of(object_id)
+        target = self.bin_manager.get(bin_id)
+        if target is None:
+            raise KeyError(bin_id)
+        if target is source:
+            return
+        obj = source.objects_tree.search_object(source.objects_tree.root, object_id)
+        if obj.size > target.capacity:
+            raise ValueError(f"Object {object_id} of size {obj.size} does not fit in bin {bin_id}")
+
+        source.objects_tree.delete_object(obj)
+        self._set_capacity(source, source.capacity + obj.size)
+        self._set_capacity(target, target.capacity - obj.size)
+        self._store(target, obj)
+        self.directory.delete(object_id)
+        self.directory.insert(object_id, bin_id)
+        if self.log is not None:
+            self._log(oplog.MOVE_OBJECT, object_id, bin_id)
+
+    def _store(self, bin, obj):
+        """Put an already accounted-for object into bin's objects_tree."""
+        bin.objects_tree.insertion(obj)
 
     def add_object(self, object_id, size, color):
-        obj = Object(object_id, size, color)
+        obj = Object(object_id, as_capacity(size), color)
 
         # Find a suitable bin for the object
         suitable_bin = self._find_suitable_bin(obj)
@@ -20,165 +250,269 @@ class GCMS:
             raise NoBinFoundException()
 
         # Add the object to the suitable bin
-        self.new_tree.insert(object_id, suitable_bin.bin_id)
-        self.bin_manager.add_object(suitable_bin, suitable_bin.bin_id, obj)
-
-        # Update the bin's capacity
-        old_capacity = suitable_bin.capacity
-        new_capacity = old_capacity - obj.size
-
-        # Preserve the current objects in the bin
-        old_objects_tree = suitable_bin.objects_tree
+        suitable_bin.add_object(obj)
+        self._record_placement(obj, suitable_bin)
+        return suitable_bin.bin_id
 
-        # Save the bin's id before deletion
-        temp_id = suitable_bin.bin_id
-
-        # Delete the bin from the trees
-        self.bin_manager.delete(suitable_bin.bin_id)
-
-        # Insert the bin with the updated capacity
-        self.bin_manager.insert(temp_id, new_capacity)
-
-        # Find the newly inserted bin and reassign the old objects
-        new_bin = self.bin_manager.id_tree.search(self.bin_manager.id_tree.root, temp_id)
-
-        if new_bin is None:
-            raise NoBinFoundException()
+    def _record_placement(self, obj, bin):
+        """Index side of a placement: directory, bin capacity and the log."""
+        self.directory.insert(obj.object_id, bin.bin_id)
 
-        new_bin.objects_tree = old_objects_tree
-        old_objects_tree = None
+        # Update the bin's capacity in place; the objects_tree stays on the bin
+        self._set_capacity(bin, bin.capacity - obj.size)
+        if self.log is not None:
+            self._log(oplog.ADD_OBJECT, obj.object_id, obj.size, obj.color.value)
 
     def delete_object(self, object_id):
-        newcurrent = self.new_tree.my_tree.search_object(self.new_tree.my_tree.root, object_id)
-        newbin_id = newcurrent.bin_id
-        new_bin = self.bin_manager.id_tree.search(self.bin_manager.id_tree.root, newbin_id)
+        new_bin = self._bin_of(object_id)
         to_delete = new_bin.objects_tree.search_object(new_bin.objects_tree.root, object_id)
-        old_objects_tree = new_bin.objects_tree
-        temp_id = new_bin.bin_id
-        add_capacity = new_bin.capacity + to_delete.size
-        self.new_tree.delete(object_id)
 
-        self.bin_manager.remove_object(newbin_id, object_id)
-        self.bin_manager.delete(new_bin.bin_id)
-
-        # Insert the bin with the updated capacity
-        self.bin_manager.insert(temp_id, add_capacity)
-
-        # Find the newly inserted bin and reassign the old objects
-        mm_bin = self.bin_manager.id_tree.search(self.bin_manager.id_tree.root, temp_id)
-
-        if mm_bin is None:
-            raise NoBinFoundException()
-
-        mm_bin.objects_tree = old_objects_tree
-        old_objects_tree = None
+        new_bin.objects_tree.delete_object(to_delete)
+        self._record_removal(to_delete, new_bin)
+
+    def _bin_of(self, object_id):
+        newbin_id = self.directory.get(object_id)
+        if newbin_id is None:
+            raise KeyError(object_id)
+        return self.bin_manager.get(newbin_id)
+
+    def _record_removal(self, obj, bin):
+        """Index side of a removal: directory, bin capacity and the log."""
+        self.directory.delete(obj.object_id)
+
+        # Update the bin's capacity in place; the objects_tree stays on the bin
+        self._set_capacity(bin, bin.capacity + obj.size)
+        if self.log is not None:
+            self._log(oplog.DELETE_OBJECT, obj.object_id)
+
+    def add_objects(self, objects):
+        """Place (object_id, size, color) tuples in order; return their bin ids.
+
+        Placements match calling add_object one by one. A NoBinFoundException
+        stops the batch, leaving the objects before it placed.
+        """
+        with self.batch():
+            return [self.add_object(object_id, size, color) for object_id, size, color in objects]
+
+    def delete_objects(self, object_ids):
+        with self.batch():
+            for object_id in object_ids:
+                self.delete_object(object_id)
+
+    @contextmanager
+    def batch(self):
+        """Defer capacity index re-keying of touched bins until the block exits.
+
+        A bin changed inside the batch leaves the capacity index on first touch
+        and goes back once, with its final capacity, however many objects it
+        took. Placement queries consult these pending bins alongside the index.
+        """
+        if self._pending is not None:
+            yield self  # Already batching
+            return
+        self._pending = {}
+        try:
+            yield self
+        finally:
+            self._flush_pending()
+            self._pending = None
+
+    def _set_capacity(self, bin, new_capacity):
+        pending = self._pending
+        if pending is None:
+            self.bin_manager.update_capacity(bin, new_capacity)
+            if instrument.stats is not None:
+                instrument.stats.rekeys += 1
+            return
+
+        keys = self._pending_keys
+        if bin.bin_id in pending:
+            del keys[bisect_left(keys, (bin.capacity, bin.bin_id))]
+        else:
+            self.bin_manager.delete_by_capacity(bin.bin_id, bin.capacity)
+            pending[bin.bin_id] = bin
+        bin.capacity = new_capacity
+        insort(keys, (new_capacity, bin.bin_id))
+        if len(pending) > self.max_pending:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        for bin in self._pending.values():
+            self.bin_manager.insert_by_capacity(bin)
+        if instrument.stats is not None:
+            instrument.stats.rekeys += len(self._pending)
+        self._pending.clear()
+        self._pending_keys.clear()
+
+    def enable_stats(self, exporter=None, export_every=10000):
+        """Start counting tree work and timing the timed_operations (see instrument.py).
+
+        exporter, if given, is called with stats() after every export_every
+        timed operations and once more by disable_stats. Tree counters and
+        timings are shared by every GCMS in the process. Does nothing if
+        stats are already on for this GCMS.
+        """
+        if self._stats_enabled:
+            return
+        self._stats_enabled = True
+        instrument.enable()
+        self._exporter = exporter
+        for name in self.timed_operations:
+            # Instance attributes shadow the methods, so nothing is timed once they go
+            setattr(self, name, self._timed(name, getattr(self, name), export_every))
+
+    def disable_stats(self):
+        """Stop timing this GCMS; the shared counters stay while another GCMS uses them."""
+        if not self._stats_enabled:
+            return
+        for name in self.timed_operations:
+            self.__dict__.pop(name, None)
+        if self._exporter is not None:
+            self._exporter(self.stats())
+        self._exporter = None
+        self._stats_enabled = False
+        instrument.disable()
+
+    def stats(self):
+        """Counters and per-operation latency histograms, or None while stats are off."""
+        if not self._stats_enabled:
+            return None
+        return instrument.stats.snapshot()
+
+    def _timed(self, name, method, export_every):
+        stats = instrument.stats
+        clock = time.perf_counter_ns
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                stats.record_time(name, clock() - start)
+                self._timed_count += 1
+                if self._exporter is not None and self._timed_count % export_every == 0:
+                    self._exporter(self.stats())
+        return timed
 
     def object_info(self, object_id):
-        newcurrent = self.new_tree.my_tree.search_object(self.new_tree.my_tree.root, object_id)
+        return self.directory.get(object_id)
 
-        # if not newcurrent:
-        #     return None
+    def objects_in_range(self, start=None, stop=None):
+        """(object_id, bin_id) pairs with start <= object_id < stop, in id order."""
+        if not self.directory.ordered:
+            raise TypeError("Range scans need an ordered directory, e.g. GCMS(directory=NewAvl())")
+        return self.directory.items(start, stop)
 
-        newbin_id = newcurrent.bin_id
-        return newbin_id
+    def bin_info(self, bin_id, lazy=False):
+        """(remaining capacity, object IDs) of a bin.
 
-    def bin_info(self, bin_id):
-        bin_node = self.bin_manager.id_tree.search(self.bin_manager.id_tree.root, bin_id)
+        With lazy=True the IDs come as an iterator from iter_bin_objects
+        instead of a list built up front.
+        """
+        bin_node = self.bin_manager.get(bin_id)
 
         if bin_node is None:
             print(f"Bin {bin_id} not found.")
             return None
 
         current_capacity = bin_node.capacity
+        if lazy:
+            return current_capacity, bin_node.iter_object_ids()
         object_ids = bin_node.get_object_ids()  # Ensure you have a method to get the object IDs
         return current_capacity, object_ids
 
+    def iter_bin_objects(self, bin_id, start_after=None, limit=None):
+        """Iterate a bin's object IDs in order, one page at a time.
+
+        Pass the last ID of a page as start_after to get the next one.
+        """
+        bin_node = self.bin_manager.get(bin_id)
+        if bin_node is None:
+            raise KeyError(bin_id)
+        object_ids = bin_node.iter_object_ids(start_after)
+        return object_ids if limit is None else islice(object_ids, limit)
+
+    def total_free_capacity(self):
+        self._flush_pending()
+        return self.bin_manager.capacity_index.total_capacity()
+
+    def count_bins_at_least(self, capacity):
+        """Number of bins with at least capacity free."""
+        self._flush_pending()
+        return self.bin_manager.capacity_index.count_at_least(capacity)
+
+    def kth_largest_bin(self, k):
+        """Id of the bin with the k-th most free capacity (k = 1 is the largest).
+
+        Ties go to the higher bin id first. Returns None if k is out of range.
+        """
+        self._flush_pending()
+        bin = self.bin_manager.capacity_index.kth_largest(k)
+        return bin.bin_id if bin else None
+
     def _find_suitable_bin(self, obj):
         if obj.color in [Color.BLUE, Color.YELLOW]:
-            suitable_node = self._compact_fit(obj)
+            suitable_bin = self._compact_fit(obj)
         else:  # Color.RED or Color.GREEN
-            suitable_node = self._largest_fit(obj)
-        return self._get_bin_from_node(suitable_node)
+            suitable_bin = self._largest_fit(obj)
+        if self._pending:
+            suitable_bin = self._pending_fit(obj, suitable_bin)
+        return suitable_bin
+
+    def _pending_fit(self, obj, suitable_bin):
+        """Let bins held out of the capacity index by a batch compete with its answer."""
+        keys = self._pending_keys
+        index = bisect_left(keys, (obj.size,))
+        if index == len(keys):
+            return suitable_bin  # No pending bin fits
+
+        color = obj.color
+        if color == Color.BLUE:
+            capacity, bin_id = keys[index]
+        elif color == Color.YELLOW:
+            capacity, bin_id = keys[bisect_right(keys, (keys[index][0], float("inf"))) - 1]
+        elif color == Color.GREEN:
+            capacity, bin_id = keys[-1]
+        else:  # Color.RED
+            capacity, bin_id = keys[bisect_left(keys, (keys[-1][0],))]
+
+        if suitable_bin is not None:
+            # Same ordering as the capacity index queries: best fit prefers the
+            # smaller capacity, largest fit the larger, then the color's id rule
+            if color == Color.BLUE:
+                better = (capacity, bin_id) < (suitable_bin.capacity, suitable_bin.bin_id)
+            elif color == Color.YELLOW:
+                better = (capacity, -bin_id) < (suitable_bin.capacity, -suitable_bin.bin_id)
+            elif color == Color.GREEN:
+                better = (capacity, bin_id) > (suitable_bin.capacity, suitable_bin.bin_id)
+            else:
+                better = (capacity, -bin_id) > (suitable_bin.capacity, -suitable_bin.bin_id)
+            if not better:
+                return suitable_bin
+        return self._pending[bin_id]
 
     def _compact_fit(self, obj):
-        current = self.bin_manager.capacity_tree.root
-        suitable_bin = None
-
-        # Step 1: Find the minimum suitable bin based on capacity
-        if obj.color == Color.BLUE:
-            while current:
-                if current.capacity >= obj.size:
-                    if suitable_bin is None or current.capacity < suitable_bin.capacity or (
-                        current.capacity == suitable_bin.capacity and current.bin_id < suitable_bin.bin_id
-                    ):
-                        suitable_bin = current
-                    current = current.left
-                else:
-                    current = current.right
-
-            if not suitable_bin:
-                return None
-            return suitable_bin
-
-        elif obj.color == Color.YELLOW:
-            while current:
-                if current.capacity >= obj.size:
-                    if suitable_bin is None or current.capacity < suitable_bin.capacity:
-                        suitable_bin = current
-                    current = current.left
-                else:
-                    current = current.right
-
-            if not suitable_bin:
-                return None
-
-            current = suitable_bin.right
-            while current:
-                if current.capacity == suitable_bin.capacity:
-                    suitable_bin = current
-                    current = current.right
-                else:
-                    current = current.left
+        index = self.bin_manager.capacity_index
 
+        # Smallest capacity that fits, lowest id among equal capacities (BLUE)
+        suitable_bin = index.ceiling(obj.size, LOWEST_ID)
+        if suitable_bin is None or obj.color == Color.BLUE:
             return suitable_bin
 
-    def _largest_fit(self, obj):
-        current = self.bin_manager.capacity_tree.root
-        suitable_bin = None
+        # YELLOW: same capacity, highest id
+        return index.floor(suitable_bin.capacity, HIGHEST_ID)
 
-        # Step 1: Find the largest suitable bin based on capacity (rightmost node)
-        while current.right:
-            current = current.right
+    def _largest_fit(self, obj):
+        index = self.bin_manager.capacity_index
 
-        if current.capacity < obj.size:
+        # Largest capacity, highest id among equal capacities (GREEN)
+        suitable_bin = index.max()
+        if suitable_bin is None or suitable_bin.capacity < obj.size:
             return None
-
         if obj.color == Color.GREEN:
-            return current
-
-        elif obj.color == Color.RED:
-            temp = self.bin_manager.capacity_tree.root
-
-            while temp.capacity != current.capacity and temp != current:
-                temp = temp.right
-
-        suitable = temp
-
-        if not temp.left:
-            return temp
-
-        temp = temp.left
-
-        while temp:
-            if temp.capacity == suitable.capacity:
-                suitable = temp
-                temp = temp.left
-            else:
-                temp = temp.right
-
-        return suitable
+            return suitable_bin
 
-    def _get_bin_from_node(self, node):
-        if node:
-            return self.bin_manager.id_tree.search(self.bin_manager.id_tree.root, node.bin_id)
-        return None
+        # RED: same capacity, lowest id
+        return index.ceiling(suitable_bin.capacity, LOWEST_ID)
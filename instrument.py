@@ -0,0 +1,126 @@
+"""Opt-in counters and timing histograms for the GCMS hot paths.
+
+While stats is None, which is the default, each hook costs one attribute
+check (per rotation, per search, per insert/delete and per re-key, never
+per comparison). GCMS.enable_stats() installs a Stats object here. Tree
+counters are process-wide, since trees do not know which GCMS owns them,
+so the Stats object stays until every enable() has had its disable().
+"""
+
+
+def _bucket(nanoseconds):
+    """Histogram bucket of a latency: four buckets per power of two, so within 25%."""
+    exponent = nanoseconds.bit_length()
+    if exponent <= 2:
+        return nanoseconds
+    return (exponent - 3) * 4 + (nanoseconds >> (exponent - 3))
+
+
+def _bucket_limit(bucket):
+    """Smallest latency above the bucket."""
+    if bucket < 4:
+        return bucket + 1
+    return (bucket % 4 + 5) << (bucket // 4 - 1)
+
+
+class Histogram:
+    """Latencies in nanoseconds, bucketed logarithmically (see _bucket)."""
+    __slots__ = ('buckets', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * 256
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds):
+        self.buckets[_bucket(nanoseconds)] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, fraction):
+        """Upper bound, in nanoseconds, of the bucket holding the given fraction of samples."""
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(_bucket_limit(bucket), self.max)
+        return self.max
+
+    def as_dict(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1000,
+            "p50_us": self.percentile(0.50) / 1000,
+            "p99_us": self.percentile(0.99) / 1000,
+            "max_us": self.max / 1000,
+        }
+
+
+class Stats:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.rotations = 0
+        self.comparisons = 0
+        self.searches = 0
+        self.search_depth = 0  # Summed over searches
+        self.max_search_depth = 0
+        self.rekeys = 0  # Capacity index delete + reinsert cycles
+        self.timings = {}  # Operation name -> Histogram
+
+    def counting(self, comparator):
+        """comparator, wrapped to count its calls."""
+        def counted(node_1, node_2):
+            self.comparisons += 1
+            return comparator(node_1, node_2)
+        return counted
+
+    def record_search(self, depth):
+        self.searches += 1
+        self.search_depth += depth
+        if depth > self.max_search_depth:
+            self.max_search_depth = depth
+
+    def record_time(self, operation, nanoseconds):
+        histogram = self.timings.get(operation)
+        if histogram is None:
+            histogram = self.timings[operation] = Histogram()
+        histogram.record(nanoseconds)
+
+    def snapshot(self):
+        return {
+            "rotations": self.rotations,
+            "comparisons": self.comparisons,
+            "searches": self.searches,
+            "mean_search_depth": self.search_depth / self.searches if self.searches else 0,
+            "max_search_depth": self.max_search_depth,
+            "rekeys": self.rekeys,
+            "timings": {operation: histogram.as_dict() for operation, histogram in self.timings.items()},
+        }
+
+
+stats = None  # The active Stats, or None while instrumentation is off
+_users = 0  # enable() calls not yet matched by disable()
+
+
+def enable():
+    global stats, _users
+    _users += 1
+    if stats is None:
+        stats = Stats()
+    return stats
+
+
+def disable():
+    global stats, _users
+    if _users:
+        _users -= 1
+    if not _users:
+        stats = None
@@ -0,0 +1,81 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """Readers-writer lock: any number of readers, or one writer.
+
+    Waiting writers block new readers, so a stream of readers cannot starve
+    them; when a writer releases, the readers that queued behind it go next,
+    so busy writers cannot starve readers either. The writing thread may
+    re-acquire the lock, for reading or writing, while it holds it; readers
+    must not nest.
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None  # Ident of the thread holding the write lock
+        self._depth = 0
+        self._waiting_writers = 0
+        self._waiting_readers = 0
+        self._readers_turn = False  # Queued readers go before the next writer
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._depth += 1
+                return
+            self._waiting_readers += 1
+            while self._writer is not None or (self._waiting_writers and not self._readers_turn):
+                self._condition.wait()
+            self._waiting_readers -= 1
+            if not self._waiting_readers:
+                self._readers_turn = False
+            self._readers += 1
+
+    def release_read(self):
+        with self._condition:
+            if self._writer == threading.get_ident():
+                self._depth -= 1
+                return
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._depth += 1
+                return
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers or self._readers_turn:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+            self._depth = 1
+
+    def release_write(self):
+        with self._condition:
+            self._depth -= 1
+            if not self._depth:
+                self._writer = None
+                self._readers_turn = self._waiting_readers > 0
+                self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -1,7 +1,29 @@
+import operator
+
+# Capacity tree keys pack (capacity, bin_id) into one int, which compares
+# faster than a tuple. bin ids must fit in 64 signed bits, as in snapshots.
+ID_OFFSET = 1 << 63
+
+
+def capacity_key(capacity, bin_id):
+    return (capacity << 64) + bin_id + ID_OFFSET
+
+
+def as_capacity(value):
+    """value as an int capacity or size; anything else cannot be packed into a key."""
+    try:
+        return operator.index(value)
+    except TypeError:
+        raise TypeError(f"Capacities and sizes must be integers, not {type(value).__name__}") from None
+
+
 class Node:
+    __slots__ = ('object_id', 'bin_id', 'key', 'left', 'right', 'parent', 'height')
+
     def __init__(self, object_id, bin_id):
         self.object_id = object_id
         self.bin_id = bin_id
+        self.key = object_id
         self.left = None
         self.right = None
         self.parent = None
@@ -28,5 +50,61 @@ class Node:
         right_height = self.right.height if self.right else 0
         return left_height - right_height
 
-        
 
+class BinNode:
+    """Index node in the id or capacity tree, pointing at a shared Bin record.
+
+    capacity is what the node is ordered by in the capacity tree. id_tree
+    nodes leave it as None; the live value is always bin.capacity. key is
+    the tree key: bin_id in the id tree, capacity_key(capacity, bin_id) in
+    the capacity tree.
+    """
+    __slots__ = ('bin_id', 'capacity', 'bin', 'key', 'left', 'right', 'parent', 'height')
+
+    def __init__(self, bin_id, capacity=None, bin=None):
+        self.bin_id = bin_id
+        self.capacity = capacity
+        self.key = bin_id if capacity is None else capacity_key(capacity, bin_id)
+        self.bin = bin
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.height = 1
+
+    def set_left(self, node):
+        self.left = node
+        if node is not None:
+            node.parent = self
+
+    def set_right(self, node):
+        self.right = node
+        if node is not None:
+            node.parent = self
+
+    def update_height(self):
+        left_height = self.left.height if self.left else 0
+        right_height = self.right.height if self.right else 0
+        self.height = 1 + max(left_height, right_height)
+
+    def balance_factor(self):
+        left_height = self.left.height if self.left else 0
+        right_height = self.right.height if self.right else 0
+        return left_height - right_height
+
+
+class CapacityNode(BinNode):
+    """Capacity index node that also tracks its subtree's bin count and total capacity."""
+    __slots__ = ('count', 'total')
+
+    def __init__(self, bin_id, capacity=None, bin=None):
+        super().__init__(bin_id, capacity, bin)
+        self.count = 1
+        self.total = capacity
+
+    def update_height(self):
+        left, right = self.left, self.right
+        left_height = left.height if left else 0
+        right_height = right.height if right else 0
+        self.height = 1 + max(left_height, right_height)
+        self.count = 1 + (left.count if left else 0) + (right.count if right else 0)
+        self.total = self.capacity + (left.total if left else 0) + (right.total if right else 0)
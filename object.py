@@ -9,8 +9,11 @@ class Color(Enum):
 
 
 class Object:
+    __slots__ = ('object_id', 'size', 'color', 'key', 'left', 'right', 'parent', 'height')
+
     def __init__(self, object_id, size, color):
         self.object_id = object_id
+        self.key = object_id  # Ordering key in the bin's objects_tree
         self.size = size
         self.color = color
         self.left = None 
@@ -0,0 +1,184 @@
+"""Append-only log of GCMS mutations, written in group-committed frames.
+
+File layout:
+
+    header   magic, version, base sequence (sequence number of the first record)
+    frames   record count, CRC32 of the records, then the records
+
+Each record is (operation, a, b, c), e.g. (ADD_OBJECT, object_id, size,
+color value). Records are buffered and written as one frame per group, so
+one write (and, depending on sync, one fsync) covers a whole group. A
+frame cut short by a crash fails its length or CRC check, and it and
+anything after it is ignored on recovery and cut off on reopen.
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+
+ADD_BIN = 1
+ADD_OBJECT = 2
+DELETE_OBJECT = 3
+RESIZE_BIN = 4
+REMOVE_BIN = 5
+MOVE_OBJECT = 6
+
+MAGIC = b"GCMSOLOG"
+VERSION = 1
+HEADER = struct.Struct("<8sHxxxxxxQ")
+FRAME = struct.Struct("<II")
+RECORD = struct.Struct("<BqqB")
+
+SYNC_MODES = ("always", "batch", "none")
+
+
+def read(path):
+    """Return (base sequence, records, end offset of the last valid frame)."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        return 0, [], 0
+    magic, version, base = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a GCMS operation log")
+    if version != VERSION:
+        raise ValueError(f"Unsupported operation log version {version}")
+
+    records = []
+    offset = HEADER.size
+    while offset + FRAME.size <= len(data):
+        count, crc = FRAME.unpack_from(data, offset)
+        start = offset + FRAME.size
+        end = start + count * RECORD.size
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            break  # Torn or corrupt frame: the log ends here
+        records.extend(RECORD.iter_unpack(data[start:end]))
+        offset = end
+    return base, records, offset
+
+
+class OperationLog:
+    """Writer side of the operation log.
+
+    sync decides what a group commit does: "always" commits and fsyncs every
+    record, "batch" fsyncs once per group, "none" only writes and leaves
+    flushing to the OS. A group is committed when it reaches group_size
+    records, on commit()/close(), or by a background flusher thread once
+    its first record is max_delay seconds old (max_delay=None: no time
+    bound). Records still buffered are lost on a crash, so callers that
+    need an acknowledgement call commit().
+    """
+    def __init__(self, path, sync="batch", group_size=512, max_delay=0.01, base=0):
+        if sync not in SYNC_MODES:
+            raise ValueError(f"sync must be one of {SYNC_MODES}")
+        self.path = path
+        self.sync = sync
+        self.group_size = 1 if sync == "always" else group_size
+        self.max_delay = max_delay
+        self.buffer = bytearray()
+        self.pending = 0
+        self.group_started = 0.0
+        # Guards the buffer and the file against the flusher thread
+        self._lock = threading.Lock()
+        self._group_started = threading.Condition(self._lock)
+        self._flusher = None  # Started by the first append that needs it
+        self._closed = False
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            base, records, end = read(path)
+            self.file = open(path, "r+b")
+            self.file.truncate(end)  # Drop a torn tail before appending after it
+            self.file.seek(end)
+            self.sequence = base + len(records)
+            self.committed = end
+        else:
+            self.sequence = base
+            self.file = open(path, "wb")
+            self.file.write(HEADER.pack(MAGIC, VERSION, base))
+            self._sync()
+            self.committed = HEADER.size
+        self.base = base
+
+    @property
+    def size(self):
+        """Bytes in the log, including the buffered group."""
+        return self.committed + len(self.buffer)
+
+    def append(self, operation, a, b=0, c=0):
+        """Buffer one record; return True if this committed the group."""
+        with self._lock:
+            if not self.pending and self.group_size > 1 and self.max_delay is not None:
+                self.group_started = time.monotonic()
+                if self._flusher is None:
+                    self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                    self._flusher.start()
+                self._group_started.notify()
+            self.buffer += RECORD.pack(operation, a, b, c)
+            self.pending += 1
+            self.sequence += 1
+            if self.pending >= self.group_size:
+                self._commit()
+                return True
+            return False
+
+    def _flush_loop(self):
+        with self._group_started:
+            while not self._closed:
+                if not self.pending:
+                    self._group_started.wait()
+                    continue
+                remaining = self.group_started + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._group_started.wait(remaining)
+                else:
+                    self._commit()
+
+    def commit(self):
+        """Write the buffered group as one frame and sync it per the sync mode."""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        if not self.pending:
+            return
+        self.file.write(FRAME.pack(self.pending, zlib.crc32(self.buffer)))
+        self.file.write(self.buffer)
+        self.committed += FRAME.size + len(self.buffer)
+        self.buffer.clear()
+        self.pending = 0
+        self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        if self.sync != "none":
+            os.fsync(self.file.fileno())
+
+    def reset(self, base):
+        """Replace the log with an empty one whose first record will be base."""
+        with self._lock:
+            self._reset(base)
+
+    def _reset(self, base):
+        self._commit()
+        temporary = self.path + ".tmp"
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, base))
+            file.flush()
+            os.fsync(file.fileno())
+        self.file.close()
+        os.replace(temporary, self.path)
+        self.file = open(self.path, "r+b")
+        self.file.seek(0, os.SEEK_END)
+        self.base = self.sequence = base
+        self.committed = HEADER.size
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._group_started.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._commit()
+            self.file.close()
@@ -0,0 +1,80 @@
+"""Memoized rejections for saturated workloads, where most adds fit nowhere.
+
+A placement that fails has searched the capacity index only to find that
+no bin is large enough. RejectingGCMS keeps an upper bound on every bin's
+remaining capacity instead, and rejects an object larger than the bound
+without searching. Every capacity change passes through _set_capacity,
+which raises the bound when a bin grows past it. Shrinking bins leave it
+loose, so a size between the true largest capacity and the bound still
+searches, and that rejection tightens the bound back to the largest
+capacity. The bound never goes below a real capacity, so placements are
+identical to GCMS.
+
+Successful placements are not cached: a best-fit answer is used up by the
+placement it serves, and a largest-fit answer by the next placement into
+that bin, so such entries almost never survive to a second lookup.
+"""
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from node import as_capacity
+
+
+class RejectionStats:
+    __slots__ = ('hits', 'misses')
+
+    def __init__(self):
+        self.hits = 0  # Rejections answered from the bound
+        self.misses = 0  # Adds that searched the capacity index
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+class RejectingGCMS(GCMS):
+    """GCMS that rejects objects larger than every bin without searching.
+
+    Opt-in: it pays one comparison per capacity change, which only returns
+    when many adds are rejected. placement_stats.as_dict() reports the
+    share of adds answered from the bound.
+    """
+    def __init__(self, directory=None, capacity_index=None):
+        super().__init__(directory, capacity_index)
+        self.largest_bound = None  # No bin has more remaining capacity; None while unknown
+        self.placement_stats = RejectionStats()
+
+    def add_object(self, object_id, size, color):
+        size = as_capacity(size)
+        bound = self.largest_bound
+        if bound is not None and size > bound:
+            self.placement_stats.hits += 1
+            raise NoBinFoundException()
+        self.placement_stats.misses += 1
+        try:
+            return super().add_object(object_id, size, color)
+        except NoBinFoundException:
+            self.largest_bound = self._largest_capacity()
+            raise
+
+    def _largest_capacity(self):
+        largest = self.bin_manager.capacity_index.max()
+        capacity = largest.capacity if largest is not None else None
+        if self._pending_keys:
+            pending = self._pending_keys[-1][0]  # Bins a batch holds out of the index
+            if capacity is None or pending > capacity:
+                capacity = pending
+        return capacity
+
+    def _set_capacity(self, bin, new_capacity):
+        bound = self.largest_bound
+        if bound is not None and new_capacity > bound:
+            self.largest_bound = new_capacity
+        super()._set_capacity(bin, new_capacity)
+
+    def add_bin(self, bin_id, capacity):
+        super().add_bin(bin_id, capacity)
+        self.largest_bound = None
+
+    def add_bins(self, bins):
+        super().add_bins(bins)
+        self.largest_bound = None
@@ -0,0 +1,144 @@
+import time
+
+from object import Object, Color
+
+
+def free_capacities(gcms):
+    """Every bin's free capacity, walking the id tree."""
+    stack = []
+    node = gcms.bin_manager.id_tree.root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        yield node.bin.capacity
+        node = node.right
+
+
+def fragmentation(gcms):
+    """How thinly free capacity is spread, from 0 to 1. O(bins).
+
+    1 - (sum of free^2) / (total free * largest free): the average free
+    capacity around a unit of free space, relative to the largest free
+    capacity, subtracted from 1. 0 when every bin with free space has the
+    largest amount; near 1 when it is scattered in small pieces, which is
+    when large RED/GREEN objects start failing although the total would
+    take them.
+    """
+    total = squares = largest = 0
+    for free in free_capacities(gcms):
+        total += free
+        squares += free * free
+        largest = max(largest, free)
+    if not total:
+        return 0.0
+    return 1 - squares / (total * largest)
+
+
+class Repacker:
+    """Incremental repacking that consolidates a GCMS's free capacity.
+
+    Bins are visited from the most free capacity down. Each object of the
+    visited bin moves to the fullest bin it fits in (best fit), provided
+    that bin has strictly less free capacity than the one it leaves. Every
+    such move grows the sum of squared free capacities, so free space ends
+    up concentrated in fewer, emptier bins, and the pass always finishes.
+
+    Work runs in step() slices bounded by a time budget, so it can be
+    interleaved with normal traffic. Moves go through GCMS.move_object,
+    which updates the objects_trees, the directory, the capacity index and
+    the log together. A slice runs as one batch(), so a bin touched by many
+    moves is re-keyed once.
+    """
+    def __init__(self, gcms):
+        self.gcms = gcms
+        self.moves = 0
+        self.moved_size = 0
+        self.bins_visited = 0
+        self.done = False
+        self._cursor = None  # (capacity, bin_id) of the bin being emptied, as it was when picked
+        self._source = None
+        self._after = None  # Last object id handled in the source bin
+
+    def restart(self):
+        """Start a new pass over all bins, keeping the totals."""
+        self.done = False
+        self._cursor = self._source = self._after = None
+
+    def _next_source(self):
+        gcms = self.gcms
+        gcms._flush_pending()  # The cursor walks the capacity index itself
+        index = gcms.bin_manager.capacity_index
+        if self._cursor is None:
+            bin = index.max()
+        else:
+            bin = index.predecessor(*self._cursor)
+        if bin is None:
+            self.done = True
+            self._source = None
+            return None
+        self._cursor = (bin.capacity, bin.bin_id)
+        self._source = bin
+        self._after = None
+        self.bins_visited += 1
+        return bin
+
+    def step(self, budget=0.005):
+        """Repack for about budget seconds; return the number of objects moved."""
+        gcms = self.gcms
+        deadline = time.perf_counter() + budget
+        moves = self.moves
+        with gcms.batch():
+            while not self.done and time.perf_counter() < deadline:
+                source = self._source
+                if source is None or gcms.bin_manager.get(source.bin_id) is not source:
+                    if self._next_source() is None:
+                        break
+                    continue
+                if not self._drain(source, deadline):
+                    self._source = None
+        return self.moves - moves
+
+    def _drain(self, source, deadline):
+        """Move what can be moved out of source. False once the bin is finished,
+        True if the deadline interrupted it."""
+        gcms = self.gcms
+        tree = source.objects_tree
+        for object_id in list(source.iter_object_ids(self._after)):
+            if time.perf_counter() >= deadline:
+                return True
+            self._after = object_id
+            obj = tree.search_object(tree.root, object_id)
+            if obj is None:
+                continue  # Deleted since the list was taken
+            # BLUE is plain best fit: the smallest free capacity that fits
+            target = gcms._find_suitable_bin(Object(None, obj.size, Color.BLUE))
+            if target is None or target is source or target.capacity >= source.capacity:
+                continue  # No bin that is fuller than the source takes it
+            gcms.move_object(object_id, target.bin_id)
+            self.moves += 1
+            self.moved_size += obj.size
+        return False
+
+    def run(self, budget=0.005):
+        """Run slices until the pass is done; return the number of objects moved."""
+        moves = self.moves
+        while not self.done:
+            self.step(budget)
+        return self.moves - moves
+
+    def metrics(self):
+        free = list(free_capacities(self.gcms))
+        total = sum(free)
+        largest = max(free, default=0)
+        return {
+            "done": self.done,
+            "bins_visited": self.bins_visited,
+            "bins": len(free),
+            "moves": self.moves,
+            "moved_size": self.moved_size,
+            "fragmentation": fragmentation(self.gcms),
+            "largest_free": largest,
+            "total_free": total,
+        }
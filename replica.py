@@ -0,0 +1,288 @@
+"""Read-only GCMS replicas in shared memory, for query-heavy reader processes.
+
+A ReplicaPublisher in the writer process copies the GCMS into a shared
+memory image of flat sorted arrays. A Replica in any process answers
+object_info and bin_info by binary search over memoryview casts of that
+image, without copying it or talking to the writer.
+
+Image layout (native byte order, every field int64):
+
+    header          magic, generation, bin count, object count
+    bin_ids         [bins]      ascending
+    capacities      [bins]      remaining capacity, same order
+    bin_starts      [bins + 1]  bin i holds bin_objects[bin_starts[i]:bin_starts[i + 1]]
+    bin_objects     [objects]   object ids grouped by bin, ascending within a bin
+    object_ids      [objects]   ascending
+    object_bin_ids  [objects]   same order
+
+Each publish writes a new image segment named <name>-<generation> and then
+points the control segment <name> at that generation. The control segment
+is a seqlock: the sequence number is odd while the generation is being
+written. A reader keeps answering from the image it has attached and
+switches on refresh(). The previous image is unlinked right after the
+switch; readers still on it keep their mapping until they move on.
+"""
+import bisect
+import struct
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from multiprocessing import resource_tracker, shared_memory
+
+MAGIC = b"GCMSREPL"
+HEADER = struct.Struct("=8sqqq")
+FIELD = struct.Struct("=q")  # Control segment: sequence at 0, generation at 8
+CONTROL_SIZE = 16
+
+_attach_lock = threading.Lock()  # One attach at a time swaps resource_tracker.register
+
+
+def _attach(name):
+    """Open an existing segment without taking ownership of it.
+
+    Before 3.13 attaching registers the segment with this process's
+    resource tracker, which unlinks it when the process exits, and
+    unregistering afterwards races with the publisher's own entry. So
+    registration of this one name is skipped while it is opened.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    with _attach_lock:
+        register = resource_tracker.register
+
+        def register_others(resource, rtype):
+            if rtype != "shared_memory" or resource.lstrip("/") != name:
+                register(resource, rtype)
+
+        resource_tracker.register = register_others
+        try:
+            return shared_memory.SharedMemory(name)
+        finally:
+            resource_tracker.register = register
+
+
+def _image_name(name, generation):
+    return f"{name}-{generation}"
+
+
+class ReplicaPublisher:
+    """Publishes images of gcms under a shared memory name (generated if None).
+
+    The image is read inside gcms.batch(), which for a ThreadSafeGCMS holds
+    the index write lock, so start() can publish from a background thread
+    while other threads write. With a plain GCMS, call publish() from the
+    writing thread instead.
+    """
+    def __init__(self, gcms, name=None):
+        self.gcms = gcms
+        self.control = shared_memory.SharedMemory(name, create=True, size=CONTROL_SIZE)
+        self.name = self.control.name
+        self.control.buf[:CONTROL_SIZE] = bytes(CONTROL_SIZE)
+        self.generation = 0
+        self._sequence = 0
+        self._image = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def publish(self):
+        """Write a new image of the GCMS and switch readers to it; return its generation."""
+        gcms = self.gcms
+        with gcms.batch():
+            bins = []
+            stack = []
+            node = gcms.bin_manager.id_tree.root
+            while stack or node:
+                while node:
+                    stack.append(node)
+                    node = node.left
+                node = stack.pop()
+                bins.append((node.bin.bin_id, node.bin.capacity))
+                node = node.right
+            objects = sorted(gcms.directory.items())
+
+        counts = Counter(bin_id for _, bin_id in objects)
+        bin_starts = array("q", [0])
+        for bin_id, _ in bins:
+            bin_starts.append(bin_starts[-1] + counts[bin_id])
+        by_bin = sorted(objects, key=lambda pair: pair[1])  # Stable: ids stay ascending per bin
+        arrays = (
+            array("q", [bin_id for bin_id, _ in bins]),
+            array("q", [capacity for _, capacity in bins]),
+            bin_starts,
+            array("q", [object_id for object_id, _ in by_bin]),
+            array("q", [object_id for object_id, _ in objects]),
+            array("q", [bin_id for _, bin_id in objects]),
+        )
+
+        generation = self.generation + 1
+        size = HEADER.size + sum(len(values) * values.itemsize for values in arrays)
+        image = shared_memory.SharedMemory(_image_name(self.name, generation), create=True, size=size)
+        HEADER.pack_into(image.buf, 0, MAGIC, generation, len(bins), len(objects))
+        offset = HEADER.size
+        for values in arrays:
+            data = values.tobytes()
+            image.buf[offset:offset + len(data)] = data
+            offset += len(data)
+
+        self._set_generation(generation)
+        previous, self._image = self._image, image
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        return generation
+
+    def _set_generation(self, generation):
+        buf = self.control.buf
+        FIELD.pack_into(buf, 0, self._sequence + 1)
+        FIELD.pack_into(buf, 8, generation)
+        FIELD.pack_into(buf, 0, self._sequence + 2)
+        self._sequence += 2
+        self.generation = generation
+
+    def start(self, interval=1.0):
+        """Publish now and then every interval seconds from a daemon thread."""
+        if self._thread is not None:
+            return
+        self.publish()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            self.publish()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop publishing and remove the segments; attached readers keep their last image."""
+        self.stop()
+        if self._image is not None:
+            self._image.close()
+            self._image.unlink()
+            self._image = None
+        if self.control is not None:
+            self.control.close()
+            self.control.unlink()
+            self.control = None
+
+
+class Replica:
+    """Read-only view of the images a ReplicaPublisher publishes under name.
+
+    Queries answer from the attached image and check for a newer one at
+    most every refresh_interval seconds (None: only on refresh()). Before
+    the first publish the replica is empty.
+    """
+    def __init__(self, name, refresh_interval=0.1):
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.generation = 0
+        self._control = _attach(name)
+        self._image = None
+        self._views = ()
+        self._next_check = 0.0
+        self._set_arrays(None)
+        self.refresh()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _set_arrays(self, views):
+        empty = memoryview(b"").cast("q")
+        self._bin_ids, self._capacities, self._bin_starts, self._bin_objects, \
+            self._object_ids, self._object_bin_ids = views or (empty,) * 6
+
+    def _read_generation(self):
+        buf = self._control.buf
+        while True:
+            sequence = FIELD.unpack_from(buf, 0)[0]
+            if sequence % 2:
+                continue  # The publisher is mid-switch
+            generation = FIELD.unpack_from(buf, 8)[0]
+            if FIELD.unpack_from(buf, 0)[0] == sequence:
+                return generation
+
+    def refresh(self):
+        """Switch to the newest published image; return True if it changed."""
+        if self.refresh_interval is not None:
+            self._next_check = time.monotonic() + self.refresh_interval
+        while True:
+            generation = self._read_generation()
+            if generation == self.generation:
+                return False
+            try:
+                image = _attach(_image_name(self.name, generation))
+            except FileNotFoundError:
+                continue  # Already replaced by a newer one
+            break
+
+        view = memoryview(image.buf)
+        magic, _, bin_count, object_count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            view.release()
+            image.close()
+            raise ValueError(f"{self.name} is not a GCMS replica")
+        views = [view]
+        offset = HEADER.size
+        for count in (bin_count, bin_count, bin_count + 1, object_count, object_count, object_count):
+            views.append(view[offset:offset + 8 * count].cast("q"))
+            offset += 8 * count
+        self._release()
+        self._image, self._views = image, views
+        self._set_arrays(views[1:])
+        self.generation = generation
+        return True
+
+    def _release(self):
+        self._set_arrays(None)
+        for view in reversed(self._views):
+            view.release()
+        self._views = ()
+        if self._image is not None:
+            self._image.close()
+            self._image = None
+
+    def _maybe_refresh(self):
+        if self.refresh_interval is not None and time.monotonic() >= self._next_check:
+            self.refresh()
+
+    def object_info(self, object_id):
+        """The bin id holding object_id, or None."""
+        self._maybe_refresh()
+        object_ids = self._object_ids
+        position = bisect.bisect_left(object_ids, object_id)
+        if position < len(object_ids) and object_ids[position] == object_id:
+            return self._object_bin_ids[position]
+        return None
+
+    def bin_info(self, bin_id):
+        """(remaining capacity, object IDs) of a bin, or None if it is unknown."""
+        self._maybe_refresh()
+        bin_ids = self._bin_ids
+        position = bisect.bisect_left(bin_ids, bin_id)
+        if position == len(bin_ids) or bin_ids[position] != bin_id:
+            return None
+        starts = self._bin_starts
+        return self._capacities[position], self._bin_objects[starts[position]:starts[position + 1]].tolist()
+
+    def close(self):
+        self._release()
+        if self._control is not None:
+            self._control.close()
+            self._control = None
@@ -0,0 +1,224 @@
+import multiprocessing
+
+from bin import Bin
+from gcms import GCMS
+from object import Object, Color
+from exceptions import NoBinFoundException
+from node import as_capacity
+
+
+class _Shard:
+    """The worker half: each bin's objects. Methods are called by name from the router.
+
+    The router owns capacities and object_id -> bin_id, so a shard only
+    keeps the objects_tree of each of its bins.
+    """
+    def __init__(self):
+        self.bins = {}  # bin_id -> Bin
+
+    def apply(self, operations):
+        """Run a batch of (method name, args) mutations in order."""
+        for name, args in operations:
+            getattr(self, name)(*args)
+
+    def add_bins(self, bin_ids):
+        for bin_id in bin_ids:
+            self.bins[bin_id] = Bin(bin_id, 0)
+
+    def place(self, bin_id, object_id, size, color):
+        self.bins[bin_id].objects_tree.insertion(Object(object_id, size, Color(color)))
+
+    def remove(self, bin_id, object_id):
+        self.bins[bin_id].remove_object(object_id)
+
+    def object_ids(self, bin_id):
+        return self.bins[bin_id].get_object_ids()
+
+    def sync(self):
+        return None
+
+
+# Calls the router does not wait on; the pipe keeps them in order with later ones
+_NO_REPLY = {"apply"}
+
+
+def _serve(connection):
+    shard = _Shard()
+    failure = None  # First error of a call nobody waited on, reported by the next reply
+    while True:
+        name, args = connection.recv()
+        if name == "close":
+            connection.close()
+            return
+        try:
+            result = getattr(shard, name)(*args)
+        except Exception as error:
+            if name in _NO_REPLY:
+                failure = failure or error
+            else:
+                connection.send((False, error))
+            continue
+        if name in _NO_REPLY:
+            continue
+        if failure is not None:
+            connection.send((False, failure))
+            failure = None
+        else:
+            connection.send((True, result))
+
+
+class ShardedGCMS:
+    """GCMS with its bins' objects offloaded to worker processes.
+
+    This spreads object storage and bin_info over processes; it does not
+    make placement scale across cores. Every change to a bin's remaining
+    capacity goes through the router, so the router keeps all capacities
+    in its own GCMS and picks each bin itself. Placements are identical to
+    a single GCMS, and the capacity search, re-keys and directory updates
+    all run on the router's core.
+
+    Asking each shard for its local candidate and merging the answers
+    does not get around that. A placement changes the winning shard's
+    next candidate, usually for the very next object as well, so every
+    placement would wait on a round trip. Measured that way, one shard
+    ran at a third of a single GCMS, and two shards were slower still.
+
+    Each worker holds the objects_trees of the bins whose id hashes to
+    it. Placements, deletes and new bins are queued per shard and sent as
+    one message per batch_size operations, or sooner when a call has to
+    wait on that shard (bin_info, flush). A shard that fails to apply one
+    keeps serving and reports the error to the next call that waits on
+    it. object_info and the capacity queries need no round trip.
+    """
+    def __init__(self, shards=None, context=None, batch_size=256):
+        context = context or multiprocessing.get_context()
+        shards = shards or context.cpu_count()
+        self.batch_size = batch_size
+        self._connections = []
+        self._processes = []
+        for _ in range(shards):
+            parent, child = context.Pipe()
+            process = context.Process(target=_serve, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._queues = [[] for _ in range(shards)]  # Operations not yet sent, per shard
+        # Bins with their remaining capacity (no objects), and object_id -> bin_id
+        self._router = GCMS()
+        self._sizes = {}  # object_id -> size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for shard in range(len(self._connections)):
+            self._send_queued(shard)
+        for connection in self._connections:
+            connection.send(("close", ()))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def _shard_of(self, bin_id):
+        return hash(bin_id) % len(self._connections)
+
+    def _queue(self, shard, name, *args):
+        queue = self._queues[shard]
+        queue.append((name, args))
+        if len(queue) >= self.batch_size:
+            self._send_queued(shard)
+
+    def _send_queued(self, shard):
+        queue = self._queues[shard]
+        if queue:
+            self._connections[shard].send(("apply", (queue,)))
+            self._queues[shard] = []
+
+    def _call(self, shard, name, *args):
+        """Run a call on a shard after its queued operations and wait for the result."""
+        self._send_queued(shard)
+        connection = self._connections[shard]
+        connection.send((name, args))
+        ok, result = connection.recv()
+        if not ok:
+            raise result
+        return result
+
+    def flush(self):
+        """Wait until every shard has applied all operations so far.
+
+        Raises the first error a shard hit while applying them.
+        """
+        for shard in range(len(self._connections)):
+            self._send_queued(shard)
+        for shard in range(len(self._connections)):
+            self._call(shard, "sync")
+
+    def add_bin(self, bin_id, capacity):
+        self.add_bins([(bin_id, capacity)])
+
+    def add_bins(self, bins):
+        bins = list(bins)
+        self._router.add_bins(bins)  # Raises before any shard sees a bad id
+        by_shard = {}
+        for bin_id, _ in bins:
+            by_shard.setdefault(self._shard_of(bin_id), []).append(bin_id)
+        for shard, bin_ids in by_shard.items():
+            self._queue(shard, "add_bins", bin_ids)
+
+    def add_object(self, object_id, size, color):
+        router = self._router
+        size = as_capacity(size)
+        obj = Object(object_id, size, color)
+        bin = router._find_suitable_bin(obj)
+        if bin is None:
+            raise NoBinFoundException()
+        router._record_placement(obj, bin)
+        self._sizes[object_id] = size
+        self._queue(self._shard_of(bin.bin_id), "place", bin.bin_id, object_id, size, color.value)
+        return bin.bin_id
+
+    def add_objects(self, objects):
+        """Place (object_id, size, color) tuples in order; return their bin ids."""
+        with self._router.batch():
+            return [self.add_object(object_id, size, color) for object_id, size, color in objects]
+
+    def delete_object(self, object_id):
+        router = self._router
+        bin_id = router.directory.get(object_id)
+        if bin_id is None:
+            raise KeyError(object_id)
+        size = self._sizes.pop(object_id)
+        router._record_removal(Object(object_id, size, Color.BLUE), router.bin_manager.get(bin_id))
+        self._queue(self._shard_of(bin_id), "remove", bin_id, object_id)
+
+    def delete_objects(self, object_ids):
+        object_ids = list(object_ids)
+        for object_id in object_ids:
+            if self._router.directory.get(object_id) is None:
+                raise KeyError(object_id)
+        with self._router.batch():
+            for object_id in object_ids:
+                self.delete_object(object_id)
+
+    def object_info(self, object_id):
+        return self._router.directory.get(object_id)
+
+    def bin_info(self, bin_id):
+        bin = self._router.bin_manager.get(bin_id)
+        if bin is None:
+            print(f"Bin {bin_id} not found.")
+            return None
+        return bin.capacity, self._call(self._shard_of(bin_id), "object_ids", bin_id)
+
+    def total_free_capacity(self):
+        return self._router.total_free_capacity()
+
+    def count_bins_at_least(self, capacity):
+        return self._router.count_bins_at_least(capacity)
@@ -0,0 +1,118 @@
+"""Replay an object stream against many candidate bin layouts at once.
+
+Capacities live in an (L, B) NumPy array, one row per layout and one column
+per bin slot, with each row's bins sorted by id (shorter layouts are padded
+with slots that never fit). An add is a handful of whole-array operations:
+mask the bins that fit, then argmin/argmax along the rows. Placements match
+GCMS._find_suitable_bin exactly:
+
+    BLUE    smallest capacity that fits, lowest id     argmin
+    YELLOW  smallest capacity that fits, highest id    argmin over reversed columns
+    GREEN   largest capacity, highest id               argmax over reversed columns
+    RED     largest capacity, lowest id                argmax
+
+argmin/argmax return the first extreme column, which is the lowest id; on
+reversed columns it is the highest.
+
+Each add scans the whole array, so it costs O(L * B) where one GCMS per
+layout costs O(L * log B), with a far larger constant. The simulation
+wins while bins per layout are few: with 8 layouts and 5000 adds it is
+about 12x faster at 500 bins, 8x at 2000, 3x at 5000 and even at
+20000; past that, replay one GCMS per layout instead. The number of
+layouts scales both sides alike. bench/simulate.py measures the
+crossover for a given stream.
+"""
+import numpy as np
+
+from object import Color
+
+_NEVER_FITS = -1  # Capacity of padding slots; every object has size >= 1
+
+
+class Simulation:
+    """Free capacity of every bin in every layout, updated a whole stream at a time.
+
+    layouts is a list of [(bin_id, capacity), ...], one per candidate layout.
+    """
+    def __init__(self, layouts):
+        width = max((len(layout) for layout in layouts), default=0)
+        self.bin_ids = np.full((len(layouts), width), -1, dtype=np.int64)
+        self.capacity = np.full((len(layouts), width), _NEVER_FITS, dtype=np.int64)
+        for row, layout in enumerate(layouts):
+            layout = sorted(layout)
+            self.bin_ids[row, :len(layout)] = [bin_id for bin_id, _ in layout]
+            self.capacity[row, :len(layout)] = [capacity for _, capacity in layout]
+        self.initial_capacity = np.where(self.capacity > 0, self.capacity, 0).sum(axis=1)
+        self.rejections = np.zeros(len(layouts), dtype=np.int64)
+        self._placements = {}  # object_id -> (size, column per layout, -1 where rejected)
+        self._rows = np.arange(len(layouts))
+        self._reversed = self.capacity.shape[1] - 1
+
+    def add_object(self, object_id, size, color):
+        """Place one object in every layout; return the chosen column per layout (-1 if rejected)."""
+        capacity = self.capacity
+        if color in (Color.BLUE, Color.YELLOW):
+            candidates = np.where(capacity >= size, capacity, np.iinfo(np.int64).max)
+            if color == Color.BLUE:
+                columns = candidates.argmin(axis=1)
+            else:
+                columns = self._reversed - candidates[:, ::-1].argmin(axis=1)
+        else:  # Color.RED or Color.GREEN: only the largest bin matters
+            if color == Color.RED:
+                columns = capacity.argmax(axis=1)
+            else:
+                columns = self._reversed - capacity[:, ::-1].argmax(axis=1)
+        # Where nothing fits, the chosen column does not fit either
+        placed = capacity[self._rows, columns] >= size
+
+        columns = np.where(placed, columns, -1)
+        rows = self._rows[placed]
+        capacity[rows, columns[placed]] -= size
+        self.rejections += ~placed
+        self._placements[object_id] = size, columns
+        return columns
+
+    def delete_object(self, object_id):
+        size, columns = self._placements.pop(object_id)
+        placed = columns >= 0
+        self.capacity[self._rows[placed], columns[placed]] += size
+
+    def run(self, operations):
+        """Apply ("add_object", (object_id, size, color)) and ("delete_object", (object_id,))
+        pairs in order; anything else, such as queries, is skipped."""
+        for name, args in operations:
+            if name == "add_object":
+                self.add_object(*args)
+            elif name == "delete_object":
+                self.delete_object(*args)
+        return self
+
+    def bin_id(self, columns):
+        """Bin ids for columns returned by add_object (-1 stays -1)."""
+        return np.where(columns >= 0, self.bin_ids[self._rows, columns], -1)
+
+    def report(self):
+        """Per-layout metrics, one dict per layout.
+
+        fill_ratio: used capacity / total capacity.
+        rejections: adds no bin could take (NoBinFoundException in GCMS).
+        fragmentation: as repack.fragmentation, 1 - (sum of free^2) /
+        (total free * largest free), so 0 when every bin with free space has
+        the largest amount and close to 1 when it is scattered.
+        """
+        free = np.where(self.capacity > 0, self.capacity, 0)
+        total_free = free.sum(axis=1)
+        largest_free = free.max(axis=1, initial=0)
+        squares = (free.astype(np.float64) ** 2).sum(axis=1)
+        total = self.initial_capacity
+        fill_ratio = np.divide(total - total_free, total, out=np.zeros(len(total)), where=total > 0)
+        concentration = np.divide(squares, total_free * largest_free.astype(np.float64),
+                                  out=np.ones(len(total)), where=total_free > 0)
+        return [
+            {
+                "fill_ratio": float(fill_ratio[row]),
+                "rejections": int(self.rejections[row]),
+                "fragmentation": float(1 - concentration[row]),
+            }
+            for row in range(len(total))
+        ]
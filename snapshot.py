@@ -0,0 +1,131 @@
+"""Compact binary snapshots of GCMS state.
+
+Layout (version 2): a fixed header followed by flat arrays in native
+byte order, 8-byte arrays first so every array stays aligned:
+
+    header           magic, version, byte order, bin count, object count,
+                     and the operation log sequence number the snapshot
+                     covers (version 1 has no sequence number; it reads as 0)
+    bin_ids          int64[bins]     ascending
+    capacities       int64[bins]     remaining capacity, same order
+    object_ids       int64[objects]  ascending
+    object_sizes     int64[objects]
+    object_bin_ids   int64[objects]
+    capacity_order   uint32[bins]    positions of the bins sorted by (capacity, bin_id)
+    object_colors    uint8[objects]  Color.value
+
+Every array is stored in the order the trees need, so loading rebuilds
+them with AVLTree.build in linear time, without per-record insertion.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from bin import Bin
+from node import BinNode
+from object import Object, Color
+
+MAGIC = b"GCMSSNAP"
+VERSION = 2
+HEADER_V1 = struct.Struct("<8sHBxxxxxQQ")
+HEADER = struct.Struct("<8sHBxxxxxQQQ")
+
+
+def save(gcms, path, sequence=0):
+    """Write gcms to path; sequence is the number of logged operations it includes."""
+    gcms._flush_pending()
+
+    bins = []
+    stack = []
+    node = gcms.bin_manager.id_tree.root
+    while stack or node:
+        while node:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        bins.append(node.bin)
+        node = node.right
+
+    objects = []
+    for bin in bins:
+        stack = []
+        node = bin.objects_tree.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            objects.append((node.object_id, node.size, node.color.value, bin.bin_id))
+            node = node.right
+    objects.sort()
+
+    capacity_order = sorted(range(len(bins)), key=lambda position: bins[position].capacity)
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, sys.byteorder == "little", len(bins), len(objects), sequence))
+        file.write(array("q", [bin.bin_id for bin in bins]).tobytes())
+        file.write(array("q", [bin.capacity for bin in bins]).tobytes())
+        file.write(array("q", [record[0] for record in objects]).tobytes())
+        file.write(array("q", [record[1] for record in objects]).tobytes())
+        file.write(array("q", [record[3] for record in objects]).tobytes())
+        file.write(array("I", capacity_order).tobytes())
+        file.write(array("B", [record[2] for record in objects]).tobytes())
+
+
+def load(gcms, path):
+    """Fill an empty GCMS from a snapshot written by save(); return its sequence number."""
+    if gcms.bin_manager.id_tree.root is not None or len(gcms.directory):
+        raise ValueError("Snapshots can only be loaded into an empty GCMS")
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return _load(gcms, view)
+        finally:
+            view.release()
+
+
+def _load(gcms, view):
+    magic, version, little_endian, bin_count, object_count = HEADER_V1.unpack_from(view)
+    if magic != MAGIC:
+        raise ValueError("Not a GCMS snapshot")
+    if version == 1:
+        sequence = 0
+        offset = HEADER_V1.size
+    elif version == VERSION:
+        sequence = HEADER.unpack_from(view)[5]
+        offset = HEADER.size
+    else:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    if little_endian != (sys.byteorder == "little"):
+        raise ValueError("Snapshot was written with a different byte order")
+
+    arrays = []
+    for code, count in (("q", bin_count), ("q", bin_count), ("q", object_count), ("q", object_count),
+                        ("q", object_count), ("I", bin_count), ("B", object_count)):
+        size = struct.calcsize(code) * count
+        arrays.append(view[offset:offset + size].cast(code))
+        offset += size
+    bin_ids, capacities, object_ids, object_sizes, object_bin_ids, capacity_order, object_colors = arrays
+
+    try:
+        bins = [Bin(bin_id, capacity) for bin_id, capacity in zip(bin_ids, capacities)]
+        by_id = {bin.bin_id: bin for bin in bins}
+
+        # Objects are stored by ascending id, so each bin's list comes out sorted too
+        contents = {}
+        colors = {color.value: color for color in Color}
+        for object_id, size, color, bin_id in zip(object_ids, object_sizes, object_colors, object_bin_ids):
+            contents.setdefault(bin_id, []).append(Object(object_id, size, colors[color]))
+        for bin_id, objects in contents.items():
+            by_id[bin_id].objects_tree.build(objects)
+
+        manager = gcms.bin_manager
+        manager.id_tree.build([BinNode(bin.bin_id, bin=bin) for bin in bins])
+        manager.capacity_index.build([bins[position] for position in capacity_order])
+        gcms.directory.build(zip(object_ids, object_bin_ids))
+    finally:
+        for array_view in arrays:
+            array_view.release()
+    return sequence
@@ -0,0 +1,5 @@
+"""Let the tests import the flat top-level modules, as bench/ does."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
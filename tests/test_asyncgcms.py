@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from asyncgcms import AsyncGCMS
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+
+
+def test_requests_run_off_the_event_loop():
+    async def main():
+        gcms = GCMS()
+        gcms.add_bin(1, 10)
+        async with AsyncGCMS(gcms) as front:
+            front.gcms.add_object = lambda *args: threading.current_thread()
+            assert await front.add_object(1, 5, Color.BLUE) is not threading.current_thread()
+
+    asyncio.run(main())
+
+
+def test_failed_request_fails_only_its_future():
+    async def main():
+        gcms = GCMS()
+        gcms.add_bin(1, 10)
+        async with AsyncGCMS(gcms) as front:
+            results = await asyncio.gather(front.add_object(1, 8, Color.BLUE), front.add_object(2, 8, Color.BLUE),
+                                           front.object_info(1), return_exceptions=True)
+        assert results[0] == 1
+        assert isinstance(results[1], NoBinFoundException)
+        assert results[2] == 1
+
+    asyncio.run(main())
+
+
+def test_worker_failure_fails_queued_requests():
+    class Broken(GCMS):
+        def batch(self):
+            raise MemoryError("out of memory")
+
+    async def main():
+        front = AsyncGCMS(Broken(), max_latency=0.01)
+        requests = [asyncio.ensure_future(front.object_info(object_id)) for object_id in range(3)]
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+        assert all(isinstance(result, MemoryError) for result in results)
+        with pytest.raises(RuntimeError):
+            await front.object_info(0)
+        with pytest.raises(MemoryError):
+            await front.close()
+
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+import pytest
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from capacity_index import AVLCapacityIndex, BlockCapacityIndex, BTreeCapacityIndex, BucketCapacityIndex
+
+INDEXES = [AVLCapacityIndex, BucketCapacityIndex, BTreeCapacityIndex, BlockCapacityIndex]
+
+
+@pytest.mark.parametrize("index", INDEXES)
+def test_add_bin_rejects_duplicate_id(index):
+    gcms = GCMS(capacity_index=index())
+    gcms.add_bin(1, 10)
+    with pytest.raises(ValueError):
+        gcms.add_bin(1, 20)
+    assert len(gcms.bin_manager.capacity_index) == 1
+    assert gcms.bin_info(1) == (10, [])
+    gcms.add_object(7, 10, Color.GREEN)
+    with pytest.raises(NoBinFoundException):
+        gcms.add_object(8, 5, Color.GREEN)  # No ghost entry with capacity 20
+
+
+@pytest.mark.parametrize("index", INDEXES)
+@pytest.mark.parametrize("existing", [[], [(5, 50)]])
+def test_add_bins_rejects_duplicates_before_inserting(index, existing):
+    gcms = GCMS(capacity_index=index())
+    gcms.add_bins(existing)
+    with pytest.raises(ValueError):
+        gcms.add_bins([(1, 10), (2, 20), (1, 30)])
+    with pytest.raises(ValueError):
+        gcms.add_bins([(3, 10), (5, 20)] if existing else [(3, 10), (3, 20)])
+    assert len(gcms.bin_manager.capacity_index) == len(existing)
+    assert gcms.bin_manager.get(1) is None and gcms.bin_manager.get(3) is None
+
+
+@pytest.mark.parametrize("index", INDEXES)
+@pytest.mark.parametrize("bin_id", [2 ** 63, -2 ** 63 - 1])
+def test_bin_ids_outside_64_bits_are_rejected(index, bin_id):
+    gcms = GCMS(capacity_index=index())
+    with pytest.raises(ValueError):
+        gcms.add_bin(bin_id, 10)
+    with pytest.raises(ValueError):
+        gcms.add_bins([(1, 10), (bin_id, 20)])
+    assert gcms.bin_info(1) is None
+    assert len(gcms.bin_manager.capacity_index) == 0
+
+
+@pytest.mark.parametrize("index", INDEXES)
+def test_bin_ids_at_64_bit_limits_order_by_capacity(index):
+    gcms = GCMS(capacity_index=index())
+    gcms.add_bins([(2 ** 63 - 1, 10), (-2 ** 63, 10), (0, 9)])
+    assert gcms.add_object(1, 10, Color.BLUE) == -2 ** 63
+    assert gcms.add_object(2, 10, Color.BLUE) == 2 ** 63 - 1
+    assert gcms.add_object(3, 9, Color.BLUE) == 0
+
+
+@pytest.mark.parametrize("index", INDEXES)
+def test_non_integer_capacities_are_rejected_before_any_change(index):
+    gcms = GCMS(capacity_index=index())
+    with pytest.raises(TypeError):
+        gcms.add_bin(1, 10.5)
+    with pytest.raises(TypeError):
+        gcms.add_bins([(2, 10), (3, 7.5)])
+    with pytest.raises(TypeError):
+        gcms.add_bin(1.5, 10)
+    assert gcms.bin_info(1) is None
+    assert gcms.bin_info(2) is None
+    assert len(gcms.bin_manager.capacity_index) == 0
+
+    gcms.add_bin(1, 10)  # The failed attempts left nothing behind
+    with pytest.raises(TypeError):
+        gcms.add_object(5, 2.5, Color.BLUE)
+    with pytest.raises(TypeError):
+        gcms.resize_bin(1, 20.0)
+    assert gcms.object_info(5) is None
+    assert gcms.bin_info(1) == (10, [])
+    assert gcms.add_object(5, 10, Color.BLUE) == 1
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from bin import Bin
+from capacity_index import (AVLCapacityIndex, BlockCapacityIndex, BTreeCapacityIndex, BucketCapacityIndex,
+                            LOWEST_ID, HIGHEST_ID)
+
+# Small fanout and block load make splits, merges and redistribution run
+ENGINES = {
+    "avl-nostats": lambda: AVLCapacityIndex(order_statistics=False),
+    "bucket": BucketCapacityIndex,
+    "btree": BTreeCapacityIndex,
+    "btree-4": lambda: BTreeCapacityIndex(4),
+    "blocks": BlockCapacityIndex,
+    "blocks-2": lambda: BlockCapacityIndex(2),
+}
+QUERIES = ("ceiling", "floor", "successor", "predecessor")
+
+
+@pytest.mark.parametrize("make_index", ENGINES.values(), ids=ENGINES.keys())
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("bins", [0, 300])
+def test_engine_agrees_with_avl(make_index, seed, bins):
+    """Same random inserts, deletes and queries against AVLCapacityIndex; every answer must match."""
+    rnd = random.Random(seed)
+    span = 10 * max(bins, 100)
+    records = [Bin(bin_id, rnd.randint(0, 100)) for bin_id in rnd.sample(range(-span, span), bins)]
+    records.sort(key=lambda bin: (bin.capacity, bin.bin_id))
+    baseline, index = AVLCapacityIndex(), make_index()
+    baseline.build(records)
+    index.build(records)
+    live = {bin.bin_id: bin for bin in records}
+    ids = list(live)
+
+    def expect(name, *args):
+        want, got = getattr(baseline, name)(*args), getattr(index, name)(*args)
+        assert got is want, f"{name}{args}: {got and got.bin_id} instead of {want and want.bin_id}"
+
+    for _ in range(3000):
+        roll = rnd.random()
+        if roll < 0.3 and ids:
+            bin = live.pop(ids.pop(rnd.randrange(len(ids))))
+            baseline.delete(bin.bin_id, bin.capacity)
+            index.delete(bin.bin_id, bin.capacity)
+        elif roll < 0.6:
+            bin = Bin(rnd.randrange(-span, span), rnd.randint(0, 100))
+            if bin.bin_id not in live:
+                live[bin.bin_id] = bin
+                ids.append(bin.bin_id)
+                baseline.insert(bin)
+                index.insert(bin)
+        else:
+            capacity = rnd.randint(-1, 101)
+            bin_id = rnd.randrange(-span, span)
+            for name in QUERIES:
+                expect(name, capacity, bin_id)
+            expect("ceiling", capacity, LOWEST_ID)
+            expect("floor", capacity, HIGHEST_ID)
+            expect("max")
+            expect("kth_largest", rnd.randint(0, len(live) + 1))
+            assert len(index) == len(baseline)
+            assert index.total_capacity() == baseline.total_capacity()
+            assert index.count_at_least(capacity) == baseline.count_at_least(capacity)
+
+    while ids:  # Drain to empty, so merges run all the way down
+        bin = live.pop(ids.pop(rnd.randrange(len(ids))))
+        baseline.delete(bin.bin_id, bin.capacity)
+        index.delete(bin.bin_id, bin.capacity)
+        expect("max")
+    assert len(index) == 0
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+import oplog
+from gcms import GCMS
+from object import Color
+
+
+def test_partial_group_is_committed_after_max_delay(tmp_path):
+    log = oplog.OperationLog(str(tmp_path / "log"), sync="none", group_size=512, max_delay=0.01)
+    try:
+        for bin_id in range(3):
+            log.append(oplog.ADD_BIN, bin_id, 10)
+        deadline = time.monotonic() + 2
+        while log.pending and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert len(oplog.read(log.path)[1]) == 3
+        assert log.size == len(open(log.path, "rb").read())
+    finally:
+        log.close()
+
+
+def test_close_commits_without_a_time_bound(tmp_path):
+    log = oplog.OperationLog(str(tmp_path / "log"), sync="none", group_size=512, max_delay=None)
+    log.append(oplog.ADD_BIN, 1, 10)
+    time.sleep(0.02)
+    assert oplog.read(log.path)[1] == []
+    log.close()
+    assert oplog.read(log.path)[1] == [(oplog.ADD_BIN, 1, 10, 0)]
+
+
+def state(gcms, bin_ids):
+    return {bin_id: gcms.bin_info(bin_id) for bin_id in bin_ids}, dict(gcms.directory.items())
+
+
+def fill(gcms):
+    gcms.add_bins([(bin_id, 100) for bin_id in range(5)])
+    for object_id in range(40):
+        gcms.add_object(object_id, object_id % 7 + 1, list(Color)[object_id % 4])
+    for object_id in range(0, 40, 3):
+        gcms.delete_object(object_id)
+    gcms.resize_bin(2, 150)
+    gcms.move_object(1, 4)
+    gcms.remove_bin(3)
+
+
+@pytest.mark.parametrize("checkpoint_bytes", [64 << 20, 300])
+def test_recovery_replays_log_over_snapshot(tmp_path, checkpoint_bytes):
+    snapshot_path, log_path = str(tmp_path / "snapshot"), str(tmp_path / "log")
+    gcms = GCMS.open(snapshot_path, log_path, checkpoint_bytes=checkpoint_bytes)
+    fill(gcms)
+    expected = state(gcms, range(5))
+    gcms.close()
+    if checkpoint_bytes == 300:
+        assert os.path.exists(snapshot_path)
+        assert oplog.read(log_path)[0] > 0  # The log was restarted after a snapshot
+
+    recovered = GCMS.open(snapshot_path, log_path)
+    assert state(recovered, range(5)) == expected
+    recovered.add_object(100, 5, Color.BLUE)  # Keeps logging where it left off
+    expected = state(recovered, range(5))
+    recovered.close()
+    assert state(GCMS.open(snapshot_path, log_path), range(5)) == expected
+
+
+def test_torn_tail_is_ignored_and_cut_off(tmp_path):
+    log_path = str(tmp_path / "log")
+    log = oplog.OperationLog(log_path, sync="always")
+    for bin_id in range(3):
+        log.append(oplog.ADD_BIN, bin_id, 10)
+    log.close()
+    with open(log_path, "ab") as file:
+        file.write(oplog.FRAME.pack(2, 0) + b"\1" * 5)  # A frame cut short by a crash
+    assert len(oplog.read(log_path)[1]) == 3
+
+    log = oplog.OperationLog(log_path, sync="always")
+    assert log.sequence == 3
+    log.append(oplog.ADD_BIN, 3, 10)
+    log.close()
+    assert [record[1] for record in oplog.read(log_path)[1]] == [0, 1, 2, 3]
+
+
+def test_log_behind_snapshot_is_restarted_at_the_snapshot(tmp_path):
+    snapshot_path, log_path = str(tmp_path / "snapshot"), str(tmp_path / "log")
+    gcms = GCMS.open(snapshot_path, log_path, sync="always")
+    gcms.add_bin(1, 100)
+    for object_id in range(8):
+        gcms.add_object(object_id, 1, Color.BLUE)
+    gcms.save(snapshot_path)  # Covers all 9 records
+    gcms.close()
+    # The OS lost the log's tail, as sync="none" allows after a crash
+    with open(log_path, "r+b") as file:
+        file.truncate(oplog.HEADER.size + 5 * (oplog.FRAME.size + oplog.RECORD.size))
+
+    gcms = GCMS.open(snapshot_path, log_path)
+    assert gcms.bin_info(1) == (92, list(range(8)))
+    gcms.add_object(8, 1, Color.BLUE)
+    gcms.add_object(9, 1, Color.BLUE)
+    gcms.close()
+    assert GCMS.open(snapshot_path, log_path).bin_info(1) == (90, list(range(10)))
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from placement_cache import RejectingGCMS
+
+
+def play(gcms, seed):
+    rng = random.Random(seed)
+    gcms.add_bins([(bin_id, rng.randint(50, 300)) for bin_id in range(40)])
+    results = []
+    placed = []
+    for start in range(0, 3000, 20):
+        with gcms.batch():  # Misses also run while a batch holds bins out of the index
+            for object_id in range(start, start + 20):
+                roll = rng.random()
+                if placed and roll < 0.1:
+                    gcms.delete_object(placed.pop(rng.randrange(len(placed))))
+                elif roll < 0.12:
+                    try:
+                        gcms.resize_bin(rng.randrange(40), rng.randint(50, 600))
+                    except ValueError:
+                        pass
+                elif roll < 0.13:
+                    gcms.add_bin(1000 + object_id, rng.randint(50, 300))
+                else:
+                    try:
+                        results.append(gcms.add_object(object_id, rng.randint(1, 120), rng.choice(list(Color))))
+                        placed.append(object_id)
+                    except NoBinFoundException:
+                        results.append(None)
+    return results, gcms.total_free_capacity()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_placements_match_gcms(seed):
+    rejecting = RejectingGCMS()
+    results, free = play(rejecting, seed)
+    assert (results, free) == play(GCMS(), seed)
+    stats = rejecting.placement_stats.as_dict()
+    assert stats["hits"] > 0
+    assert stats["hits"] + stats["misses"] == len(results)
+
+
+def test_bound_follows_growing_bins():
+    gcms = RejectingGCMS()
+    gcms.add_bin(1, 10)
+    with pytest.raises(NoBinFoundException):
+        gcms.add_object(1, 20, Color.BLUE)
+    assert gcms.largest_bound == 10
+    with pytest.raises(NoBinFoundException):
+        gcms.add_object(2, 20, Color.RED)  # Answered from the bound
+    assert gcms.placement_stats.hits == 1
+    gcms.resize_bin(1, 30)
+    assert gcms.add_object(3, 20, Color.BLUE) == 1
+    gcms.add_bin(2, 50)
+    assert gcms.add_object(4, 40, Color.GREEN) == 2
+
+
+def test_failed_remove_bin_keeps_the_bin_placeable():
+    gcms = RejectingGCMS()
+    gcms.add_bins([(1, 100), (2, 10)])
+    gcms.add_object(1, 50, Color.BLUE)
+    with pytest.raises(NoBinFoundException):
+        gcms.remove_bin(1)  # Object 1 fits nowhere else
+    assert gcms.add_object(2, 40, Color.BLUE) == 1
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+from multiprocessing import resource_tracker
+from pathlib import Path
+
+from gcms import GCMS
+from object import Color
+from replica import Replica, ReplicaPublisher
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+
+
+def filled():
+    gcms = GCMS()
+    gcms.add_bins([(1, 10), (2, 20)])
+    gcms.add_object(7, 4, Color.BLUE)
+    return gcms
+
+
+def test_replica_matches_gcms_and_follows_publishes():
+    gcms = filled()
+    with ReplicaPublisher(gcms) as publisher:
+        publisher.publish()
+        with Replica(publisher.name, refresh_interval=None) as replica:
+            assert replica.object_info(7) == 1
+            assert replica.bin_info(1) == (6, [7])
+            gcms.add_object(8, 15, Color.BLUE)
+            publisher.publish()
+            assert replica.object_info(8) is None  # Until refresh
+            assert replica.refresh()
+            assert replica.object_info(8) == 2
+            assert replica.bin_info(3) is None
+
+
+def test_attaching_leaves_resource_tracker_alone():
+    register = resource_tracker.register
+    with ReplicaPublisher(filled()) as publisher:
+        publisher.publish()
+        Replica(publisher.name).close()
+        assert resource_tracker.register is register
+
+
+def test_reader_in_unrelated_process_does_not_unlink_segments():
+    with ReplicaPublisher(filled()) as publisher:
+        publisher.publish()
+        code = (f"import sys; sys.path.insert(0, {ROOT!r}); from replica import Replica; "
+                f"replica = Replica({publisher.name!r}); print(replica.object_info(7)); replica.close()")
+        for _ in range(2):  # The second reader needs the segments the first one attached
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=30)
+            assert result.stdout == "1\n"
+            assert result.stderr == ""
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from sharded import ShardedGCMS
+
+
+def play(gcms, bins, seed):
+    rng = random.Random(seed)
+    gcms.add_bins(bins)
+    placements = []
+    placed = []
+    for object_id in range(3000):
+        if placed and rng.random() < 0.3:
+            gcms.delete_object(placed.pop(rng.randrange(len(placed))))
+            continue
+        try:
+            placements.append(gcms.add_object(object_id, rng.randint(1, 30), rng.choice(list(Color))))
+            placed.append(object_id)
+        except NoBinFoundException:
+            placements.append(None)
+    return placements, gcms.total_free_capacity(), gcms.count_bins_at_least(100)
+
+
+@pytest.mark.parametrize("shards", [1, 3])
+def test_placements_match_gcms(shards):
+    rng = random.Random(shards)
+    bins = [(bin_id, rng.randint(50, 500)) for bin_id in rng.sample(range(10 ** 6), 100)]
+    gcms = GCMS()
+    with ShardedGCMS(shards, batch_size=16) as sharded:
+        assert play(sharded, bins, 0) == play(gcms, bins, 0)
+        for bin_id, _ in bins:
+            capacity, object_ids = gcms.bin_info(bin_id)
+            assert sharded.bin_info(bin_id) == (capacity, list(object_ids))
+
+
+def test_shard_reports_failed_operation_and_keeps_serving():
+    with ShardedGCMS(1) as sharded:
+        sharded.add_bin(1, 10)
+        sharded._queue(0, "place", 2, 5, 1, Color.BLUE.value)  # Bin 2 is unknown to the shard
+        with pytest.raises(KeyError):
+            sharded.flush()
+        sharded.add_object(6, 4, Color.BLUE)
+        sharded.flush()
+        assert sharded.bin_info(1) == (6, [6])
+
+
+def test_add_bins_rejects_duplicates():
+    with ShardedGCMS(2) as sharded:
+        sharded.add_bin(1, 10)
+        with pytest.raises(ValueError):
+            sharded.add_bins([(2, 5), (1, 5)])
+        assert sharded.total_free_capacity() == 10
+        assert sharded.bin_info(2) is None
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from repack import fragmentation
+
+np = pytest.importorskip("numpy")
+from simulate import Simulation  # noqa: E402
+
+
+def test_placements_match_gcms():
+    rng = random.Random(3)
+    layouts = [[(bin_id, rng.randint(20, 200)) for bin_id in rng.sample(range(1000), rng.randint(5, 40))]
+               for _ in range(8)]
+    for layout in layouts:  # Repeat capacities so the id tie-breaks are exercised
+        layout += [(bin_id + 1000, layout[0][1]) for bin_id, _ in layout[:3]]
+    operations = []
+    live = []
+    for object_id in range(3000):
+        if live and rng.random() < 0.35:
+            operations.append(("delete_object", (live.pop(rng.randrange(len(live))),)))
+        else:
+            operations.append(("add_object", (object_id, rng.randint(1, 30), rng.choice(list(Color)))))
+            live.append(object_id)
+
+    simulation = Simulation(layouts)
+    indexes = [GCMS() for _ in layouts]
+    for gcms, layout in zip(indexes, layouts):
+        gcms.add_bins(layout)
+    rejections = [0] * len(layouts)
+    for name, args in operations:
+        if name == "add_object":
+            expected = simulation.bin_id(simulation.add_object(*args))
+            for row, gcms in enumerate(indexes):
+                try:
+                    bin_id = gcms.add_object(*args)
+                except NoBinFoundException:
+                    bin_id = -1
+                    rejections[row] += 1
+                assert bin_id == expected[row]
+        else:
+            simulation.delete_object(*args)
+            for gcms in indexes:
+                if gcms.object_info(args[0]) is not None:
+                    gcms.delete_object(*args)
+
+    report = simulation.report()
+    for row, gcms in enumerate(indexes):
+        assert gcms.total_free_capacity() == int(np.maximum(simulation.capacity[row], 0).sum())
+        assert report[row]["rejections"] == rejections[row]
+        assert report[row]["fragmentation"] == pytest.approx(fragmentation(gcms))
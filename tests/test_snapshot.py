@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from bin import NewAvl
+from capacity_index import AVLCapacityIndex, BlockCapacityIndex, BTreeCapacityIndex, BucketCapacityIndex
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+import snapshot
+
+
+@pytest.mark.parametrize("index", [AVLCapacityIndex, BucketCapacityIndex, BTreeCapacityIndex, BlockCapacityIndex])
+@pytest.mark.parametrize("directory", [None, NewAvl])
+def test_save_load_round_trip(tmp_path, index, directory):
+    rng = random.Random(0)
+    gcms = GCMS()
+    gcms.add_bins([(bin_id, rng.choice([50, 100, 200])) for bin_id in rng.sample(range(-1000, 1000), 60)])
+    for object_id in rng.sample(range(10 ** 6), 500):
+        try:
+            gcms.add_object(object_id, rng.randint(1, 20), rng.choice(list(Color)))
+        except NoBinFoundException:
+            pass
+    path = str(tmp_path / "snapshot")
+    gcms.save(path)
+
+    loaded = GCMS.load(path, directory() if directory else None, index())
+    assert dict(loaded.directory.items()) == dict(gcms.directory.items())
+    for bin_id in range(-1000, 1000):
+        assert loaded.bin_info(bin_id) == gcms.bin_info(bin_id)
+    assert loaded.total_free_capacity() == gcms.total_free_capacity()
+    for object_id in range(-50, 0):  # Placements go on exactly as before
+        size, color = rng.randint(1, 20), rng.choice(list(Color))
+        try:
+            expected = gcms.add_object(object_id, size, color)
+        except NoBinFoundException:
+            expected = None
+        try:
+            assert loaded.add_object(object_id, size, color) == expected
+        except NoBinFoundException:
+            assert expected is None
+
+
+def test_load_refuses_a_non_empty_gcms(tmp_path):
+    gcms = GCMS()
+    gcms.add_bin(1, 10)
+    path = str(tmp_path / "snapshot")
+    gcms.save(path)
+    with pytest.raises(ValueError):
+        snapshot.load(gcms, path)
@@ -0,0 +1,29 @@
+import instrument
+from gcms import GCMS
+from object import Color
+
+
+def test_enable_stats_twice_times_each_call_once():
+    gcms = GCMS()
+    gcms.enable_stats()
+    gcms.enable_stats()
+    gcms.add_bin(1, 10)
+    assert gcms.stats()["timings"]["add_bin"]["count"] == 1
+    gcms.disable_stats()
+    assert gcms.stats() is None
+    assert instrument.stats is None
+
+
+def test_disable_stats_keeps_counters_other_instances_use():
+    first, second = GCMS(), GCMS()
+    first.enable_stats()
+    second.enable_stats()
+    first.disable_stats()
+    first.disable_stats()  # A second disable must not release the other's reference
+    assert instrument.stats is not None
+    second.add_bin(1, 10)
+    second.add_object(1, 5, Color.BLUE)
+    assert second.stats()["timings"]["add_object"]["count"] == 1
+    assert first.stats() is None
+    second.disable_stats()
+    assert instrument.stats is None
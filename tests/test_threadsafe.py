@@ -0,0 +1,59 @@
+import threading
+
+from gcms import GCMS
+from object import Color
+from threadsafe import ThreadSafeGCMS
+
+
+def test_checkpoint_during_add_object_keeps_the_object(tmp_path):
+    snapshot_path, log_path = str(tmp_path / "snapshot"), str(tmp_path / "log")
+    gcms = ThreadSafeGCMS.open(snapshot_path, log_path, checkpoint_bytes=200)
+    gcms.add_bin(1, 1000)
+    for object_id in range(20):
+        gcms.add_object(object_id, 1, Color.BLUE)
+    gcms.close()
+
+    recovered = GCMS.open(snapshot_path, log_path)
+    assert recovered.bin_info(1) == (980, list(range(20)))
+    recovered.close()
+
+
+def test_delete_object_recovers(tmp_path):
+    snapshot_path, log_path = str(tmp_path / "snapshot"), str(tmp_path / "log")
+    gcms = ThreadSafeGCMS.open(snapshot_path, log_path, checkpoint_bytes=200)
+    gcms.add_bin(1, 1000)
+    for object_id in range(20):
+        gcms.add_object(object_id, 1, Color.BLUE)
+    for object_id in range(0, 20, 2):
+        gcms.delete_object(object_id)
+    gcms.close()
+
+    recovered = GCMS.open(snapshot_path, log_path)
+    assert recovered.bin_info(1) == (990, list(range(1, 20, 2)))
+    recovered.close()
+
+
+def test_save_while_adding_writes_consistent_snapshots(tmp_path):
+    gcms = ThreadSafeGCMS()
+    gcms.add_bins([(bin_id, 100) for bin_id in range(4)])
+    done = threading.Event()
+
+    def add():
+        for object_id in range(300):
+            gcms.add_object(object_id, 1, Color.BLUE)
+        done.set()
+
+    thread = threading.Thread(target=add)
+    thread.start()
+    paths = []
+    while not done.is_set() or not paths:
+        path = str(tmp_path / f"snapshot-{len(paths)}")
+        gcms.save(path)
+        paths.append(path)
+    thread.join()
+
+    for path in paths:
+        loaded = GCMS.load(path)
+        for bin_id in range(4):
+            capacity, object_ids = loaded.bin_info(bin_id)
+            assert capacity == 100 - len(object_ids)
@@ -0,0 +1,165 @@
+import random
+
+import pytest
+
+from bin import NewAvl
+from exceptions import NoBinFoundException
+from gcms import GCMS
+from object import Color
+from vector import VectorGCMS
+
+
+def brute_force_pick(bins, size, color):
+    fitting = [(capacity, bin_id) for bin_id, capacity in bins.items()
+               if capacity[0] >= size[0] and capacity[1] >= size[1]]
+    if not fitting:
+        return None
+    if color in (Color.BLUE, Color.YELLOW):
+        primary = min(capacity[0] for capacity, _ in fitting)
+    else:
+        primary = max(capacity[0] for capacity, _ in fitting)
+    bin_ids = [bin_id for capacity, bin_id in fitting if capacity[0] == primary]
+    return min(bin_ids) if color in (Color.BLUE, Color.RED) else max(bin_ids)
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_placements_match_brute_force(seed):
+    rng = random.Random(seed)
+    gcms = VectorGCMS(NewAvl() if seed % 2 else None)
+    layout = [(bin_id, (rng.randint(10, 60), rng.randint(10, 60)))
+              for bin_id in rng.sample(range(10 ** 5), rng.randint(1, 60))]
+    if seed % 3:
+        gcms.add_bins(layout)
+    else:
+        for bin_id, capacity in layout:
+            gcms.add_bin(bin_id, capacity)
+    bins = dict(layout)
+    placed = {}
+    for object_id in range(1000):
+        if placed and rng.random() < 0.35:
+            victim = rng.choice(list(placed))
+            bin_id, size = placed.pop(victim)
+            gcms.delete_object(victim)
+            bins[bin_id] = (bins[bin_id][0] + size[0], bins[bin_id][1] + size[1])
+            continue
+        size = (rng.randint(1, 15), rng.randint(1, 15))
+        color = rng.choice(list(Color))
+        expected = brute_force_pick(bins, size, color)
+        try:
+            bin_id = gcms.add_object(object_id, size, color)
+        except NoBinFoundException:
+            bin_id = None
+        assert bin_id == expected
+        if bin_id is not None:
+            placed[object_id] = bin_id, size
+            bins[bin_id] = (bins[bin_id][0] - size[0], bins[bin_id][1] - size[1])
+
+    assert gcms.total_free_capacity() == (sum(c[0] for c in bins.values()), sum(c[1] for c in bins.values()))
+    for bin_id, capacity in bins.items():
+        assert gcms.bin_info(bin_id)[0] == capacity
+    for threshold in [(0, 0), (20, 30), (45, 10), (70, 70)]:
+        expected = sum(1 for c in bins.values() if c[0] >= threshold[0] and c[1] >= threshold[1])
+        assert gcms.count_bins_at_least(threshold) == expected
+
+
+def filled():
+    gcms = VectorGCMS()
+    gcms.add_bins([(1, (10, 10)), (2, (20, 5)), (3, (7, 7))])
+    gcms.add_object(100, (4, 4), Color.BLUE)  # Bin 3
+    gcms.add_object(101, (8, 2), Color.BLUE)  # Bin 1
+    return gcms
+
+
+def state(gcms):
+    return {bin_id: gcms.bin_info(bin_id) for bin_id in (1, 2, 3, 4)}, gcms.total_free_capacity()
+
+
+def test_only_one_dimensional_gcms_operations_are_absent():
+    missing = {name for name in dir(GCMS) if not name.startswith("_") and not hasattr(VectorGCMS, name)}
+    assert missing == {"from_bins", "load", "open", "save", "checkpoint", "commit", "close",
+                       "kth_largest_bin", "enable_stats", "disable_stats", "stats",
+                       "max_pending", "timed_operations"}
+
+
+def test_add_bin_rejects_duplicates():
+    gcms = filled()
+    before = state(gcms)
+    with pytest.raises(ValueError):
+        gcms.add_bin(2, (1, 1))
+    with pytest.raises(ValueError):
+        gcms.add_bins([(4, (1, 1)), (3, (1, 1))])
+    assert state(gcms) == before
+
+
+def test_resize_bin():
+    gcms = filled()
+    gcms.resize_bin(3, (9, 5))
+    assert gcms.bin_info(3) == ((5, 1), [100])
+    before = state(gcms)
+    with pytest.raises(ValueError):
+        gcms.resize_bin(3, (3, 10))
+    with pytest.raises(KeyError):
+        gcms.resize_bin(4, (1, 1))
+    assert state(gcms) == before
+
+
+def test_remove_bin_migrates():
+    gcms = filled()
+    gcms.remove_bin(3)
+    assert gcms.object_info(100) == 2
+    assert gcms.bin_info(2) == ((16, 1), [100])
+    assert gcms.bin_info(3) is None
+    assert gcms.total_free_capacity() == (18, 9)
+
+
+def test_remove_bin_that_cannot_migrate_changes_nothing():
+    gcms = filled()
+    gcms.add_object(102, (15, 4), Color.RED)  # Bin 2, leaving (5, 1)
+    before = state(gcms)
+    with pytest.raises(NoBinFoundException):
+        gcms.remove_bin(1)  # Object 101 (8, 2) fits nowhere else
+    assert state(gcms) == before
+    assert gcms.add_object(103, (2, 8), Color.BLUE) == 1  # Bin 1 is still in the capacity index
+
+
+def test_remove_bin_without_migrate_deletes_objects():
+    gcms = filled()
+    gcms.remove_bin(1, migrate=False)
+    assert gcms.object_info(101) is None
+    assert gcms.total_free_capacity() == (23, 8)
+    with pytest.raises(KeyError):
+        gcms.remove_bin(1)
+
+
+def test_move_object():
+    gcms = filled()
+    gcms.move_object(100, 2)
+    assert gcms.object_info(100) == 2
+    assert gcms.bin_info(2) == ((16, 1), [100])
+    assert gcms.bin_info(3) == ((7, 7), [])
+    before = state(gcms)
+    with pytest.raises(ValueError):
+        gcms.move_object(101, 3)  # (8, 2) into (7, 7): too heavy
+    with pytest.raises(ValueError):
+        gcms.move_object(101, 2)  # (8, 2) into (16, 1): too bulky
+    with pytest.raises(KeyError):
+        gcms.move_object(999, 1)
+    with pytest.raises(KeyError):
+        gcms.move_object(101, 4)
+    assert state(gcms) == before
+
+
+def test_batch_operations_and_lookups():
+    gcms = VectorGCMS(NewAvl())
+    gcms.add_bins([(1, (10, 10)), (2, (5, 5))])
+    with gcms.batch():
+        assert gcms.add_objects([(1, (3, 3), Color.BLUE), (2, (4, 4), Color.GREEN)]) == [2, 1]
+    assert list(gcms.objects_in_range(1, 3)) == [(1, 2), (2, 1)]
+    assert list(gcms.iter_bin_objects(1)) == [2]
+    assert gcms.count_bins_at_least((2, 2)) == 2
+    gcms.delete_objects([1, 2])
+    assert gcms.total_free_capacity() == (15, 15)
+    with pytest.raises(KeyError):
+        gcms.delete_object(1)
+    with pytest.raises(TypeError):
+        VectorGCMS().objects_in_range()
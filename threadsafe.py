@@ -0,0 +1,188 @@
+import threading
+from contextlib import contextmanager
+
+from gcms import GCMS
+from object import Object
+from exceptions import NoBinFoundException
+from locks import RWLock
+from node import as_capacity
+
+
+class ThreadSafeGCMS(GCMS):
+    """GCMS that can be shared by a thread pool.
+
+    Locking is two-level, always taken in this order:
+
+    - an RWLock over the indexes (id tree, capacity index, directory, log).
+      object_info, bin lookups and the capacity queries share it as readers.
+      Every mutation holds it as a writer, objects_tree edit included, so
+      save() and checkpoint(), which also write, never see a tree that
+      disagrees with the capacities and log sequence they record.
+    - one lock per bin over its objects_tree, taken for each tree edit and
+      by the bin_info/iter_bin_objects reads.
+
+    Batches (batch(), add_objects, delete_objects) hold the index write
+    lock for their whole duration.
+    """
+    # Objects read per bin-lock hold when iterating a bin lazily
+    page_size = 1024
+
+    def __init__(self, directory=None, capacity_index=None):
+        super().__init__(directory, capacity_index)
+        self._lock = RWLock()
+        self._bin_locks = {}  # bin_id -> threading.Lock
+
+    def _bin_lock(self, bin_id):
+        lock = self._bin_locks.get(bin_id)
+        if lock is None:
+            # setdefault is atomic, so racing threads end up with one lock
+            lock = self._bin_locks.setdefault(bin_id, threading.Lock())
+        return lock
+
+    def add_bin(self, bin_id, capacity):
+        with self._lock.write():
+            super().add_bin(bin_id, capacity)
+
+    def add_bins(self, bins):
+        with self._lock.write():
+            super().add_bins(bins)
+
+    def resize_bin(self, bin_id, new_capacity):
+        with self._lock.write(), self._bin_lock(bin_id):
+            super().resize_bin(bin_id, new_capacity)
+
+    def remove_bin(self, bin_id, migrate=True):
+        # Bin locks of the bins receiving objects are taken in _store; no other
+        # thread holds two bin locks, so holding this one meanwhile is safe
+        with self._lock.write():
+            with self._bin_lock(bin_id):
+                super().remove_bin(bin_id, migrate)
+            self._bin_locks.pop(bin_id, None)
+
+    def move_object(self, object_id, bin_id):
+        with self._lock.write():
+            source_id = self.directory.get(object_id)
+            if source_id is None:
+                raise KeyError(object_id)
+            # The target's lock is taken in _store
+            with self._bin_lock(source_id):
+                super().move_object(object_id, bin_id)
+
+    def _store(self, bin, obj):
+        with self._bin_lock(bin.bin_id):
+            super()._store(bin, obj)
+
+    def add_object(self, object_id, size, color):
+        obj = Object(object_id, as_capacity(size), color)
+        with self._lock.write():
+            suitable_bin = self._find_suitable_bin(obj)
+            if suitable_bin is None:
+                raise NoBinFoundException()
+            # The tree first, as in GCMS: logging may checkpoint, and the
+            # snapshot must find the object where the capacities say it is
+            self._store(suitable_bin, obj)
+            self._record_placement(obj, suitable_bin)
+        return suitable_bin.bin_id
+
+    def delete_object(self, object_id):
+        with self._lock.write():
+            bin = self._bin_of(object_id)
+            with self._bin_lock(bin.bin_id):
+                to_delete = bin.objects_tree.search_object(bin.objects_tree.root, object_id)
+                bin.objects_tree.delete_object(to_delete)
+            self._record_removal(to_delete, bin)
+
+    @contextmanager
+    def batch(self):
+        with self._lock.write():
+            with super().batch():
+                yield self
+
+    def object_info(self, object_id):
+        if not self.directory.ordered:
+            # The default directory is a dict; a single lookup is atomic
+            return self.directory.get(object_id)
+        with self._lock.read():
+            return self.directory.get(object_id)
+
+    def objects_in_range(self, start=None, stop=None):
+        with self._lock.read():
+            return list(super().objects_in_range(start, stop))
+
+    @contextmanager
+    def _reading(self, bin_id):
+        """Hold the index read lock and the bin's lock; yield the bin, or None."""
+        with self._lock.read():
+            bin = self.bin_manager.get(bin_id)
+            if bin is None:
+                yield None
+                return
+            with self._bin_lock(bin_id):
+                yield bin
+
+    def bin_info(self, bin_id, lazy=False):
+        with self._reading(bin_id) as bin:
+            if bin is None:
+                print(f"Bin {bin_id} not found.")
+                return None
+            if not lazy:
+                return bin.capacity, bin.get_object_ids()
+            capacity = bin.capacity
+        return capacity, self._iter_pages(bin_id, None)
+
+    def iter_bin_objects(self, bin_id, start_after=None, limit=None):
+        with self._reading(bin_id) as bin:
+            if bin is None:
+                raise KeyError(bin_id)
+            if limit is not None:
+                return iter(self._page(bin, start_after, limit))
+        return self._iter_pages(bin_id, start_after)
+
+    def _page(self, bin, start_after, limit):
+        page = []
+        for object_id in bin.iter_object_ids(start_after):
+            page.append(object_id)
+            if len(page) == limit:
+                break
+        return page
+
+    def _iter_pages(self, bin_id, start_after):
+        """Yield a bin's ids a page at a time, resuming from the last id after each
+        page so no lock is held while the caller consumes them."""
+        while True:
+            with self._reading(bin_id) as bin:
+                if bin is None:
+                    return  # Removed meanwhile
+                page = self._page(bin, start_after, self.page_size)
+            yield from page
+            if len(page) < self.page_size:
+                return
+            start_after = page[-1]
+
+    def total_free_capacity(self):
+        with self._lock.read():
+            return super().total_free_capacity()
+
+    def count_bins_at_least(self, capacity):
+        with self._lock.read():
+            return super().count_bins_at_least(capacity)
+
+    def kth_largest_bin(self, k):
+        with self._lock.read():
+            return super().kth_largest_bin(k)
+
+    def save(self, path):
+        with self._lock.write():
+            super().save(path)
+
+    def checkpoint(self):
+        with self._lock.write():
+            super().checkpoint()
+
+    def commit(self):
+        with self._lock.write():
+            super().commit()
+
+    def close(self):
+        with self._lock.write():
+            super().close()
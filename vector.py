@@ -0,0 +1,383 @@
+"""Placement with two-dimensional sizes, e.g. (weight, volume).
+
+Objects have size=(w, v) and bins capacity=(W, V); an object fits a bin when
+it fits in both. The Color policies order bins on the first dimension, as
+the 1-D ones order on capacity:
+
+    BLUE    smallest W that fits, lowest id
+    YELLOW  smallest W that fits, highest id
+    GREEN   largest W that fits, highest id
+    RED     largest W that fits, lowest id
+
+where "fits" also requires V >= v. VectorCapacityIndex keeps (W, bin_id)
+keys in an AVL tree whose nodes carry the largest V in their subtree, so
+a search skips every subtree where nothing has room for v instead of
+scanning the bins that are wide enough but too small in the second
+dimension. GCMS and its 1-D index are untouched.
+"""
+from contextlib import contextmanager
+from itertools import islice
+
+from avl import KeyedAVLTree
+from bin import AVLManager
+from capacity_index import LOWEST_ID, HIGHEST_ID
+from directory import ObjectDirectory
+from exceptions import NoBinFoundException
+from object import Object, Color
+
+
+def _plus(capacity, size):
+    return capacity[0] + size[0], capacity[1] + size[1]
+
+
+def _minus(capacity, size):
+    return capacity[0] - size[0], capacity[1] - size[1]
+
+
+class VectorNode:
+    """Capacity index node for a bin with a (primary, secondary) capacity.
+
+    best is the largest secondary capacity in the node's subtree.
+    """
+    __slots__ = ('bin_id', 'primary', 'secondary', 'bin', 'key', 'best', 'left', 'right', 'parent', 'height')
+
+    def __init__(self, bin_id, capacity, bin=None):
+        self.bin_id = bin_id
+        self.primary, self.secondary = capacity
+        self.bin = bin
+        self.key = (self.primary, bin_id)
+        self.best = self.secondary
+        self.left = None
+        self.right = None
+        self.parent = None
+        self.height = 1
+
+    def set_left(self, node):
+        self.left = node
+        if node is not None:
+            node.parent = self
+
+    def set_right(self, node):
+        self.right = node
+        if node is not None:
+            node.parent = self
+
+    def update_height(self):
+        left, right = self.left, self.right
+        left_height = left.height if left else 0
+        right_height = right.height if right else 0
+        self.height = 1 + max(left_height, right_height)
+        best = self.secondary
+        if left is not None and left.best > best:
+            best = left.best
+        if right is not None and right.best > best:
+            best = right.best
+        self.best = best
+
+    def balance_factor(self):
+        left_height = self.left.height if self.left else 0
+        right_height = self.right.height if self.right else 0
+        return left_height - right_height
+
+
+def _refresh(node):
+    """Recompute best (and height) from node up to the root."""
+    while node is not None:
+        node.update_height()
+        node = node.parent
+
+
+class VectorCapacityIndex:
+    """Capacity index over (primary, bin_id) keys for (primary, secondary) capacities.
+
+    ceiling and floor take a size (p, s) and only consider bins whose
+    secondary capacity is at least s.
+    """
+    __slots__ = ('tree', 'totals')
+
+    def __init__(self):
+        self.tree = KeyedAVLTree()
+        self.totals = [0, 0]
+
+    def __len__(self):
+        return self.tree.size
+
+    def insert(self, bin):
+        node = VectorNode(bin.bin_id, bin.capacity, bin)
+        size = self.tree.size
+        self.tree.insertion(node)
+        if self.tree.size == size:
+            return  # Already indexed
+        _refresh(node.parent)
+        self.totals[0] += node.primary
+        self.totals[1] += node.secondary
+
+    def delete(self, bin_id, capacity):
+        tree = self.tree
+        target = tree.search_key((capacity[0], bin_id))
+        if target is None:
+            return
+        # The lowest node whose subtree changes: where the successor leaves
+        # from, or target's parent when target has at most one child
+        if target.left is not None and target.right is not None:
+            successor = tree.leftmost(target.right)
+            lowest = successor if successor.parent is target else successor.parent
+        else:
+            lowest = target.parent
+        tree._unlink(target, tree._path_to(target))
+        _refresh(lowest)
+        self.totals[0] -= target.primary
+        self.totals[1] -= target.secondary
+
+    def build(self, bins):
+        """Load bins into an empty index (any order)."""
+        nodes = sorted((VectorNode(bin.bin_id, bin.capacity, bin) for bin in bins), key=lambda node: node.key)
+        self.tree.build(nodes)  # update_height computes best bottom-up
+        for node in nodes:
+            self.totals[0] += node.primary
+            self.totals[1] += node.secondary
+
+    def ceiling(self, size, bin_id):
+        """The bin with the smallest key >= (size[0], bin_id) and secondary >= size[1], or None."""
+        node = self._first(self.tree.root, (size[0], bin_id), size[1])
+        return node.bin if node else None
+
+    def floor(self, size, bin_id):
+        """The bin with the largest key <= (size[0], bin_id) and secondary >= size[1], or None."""
+        node = self._last(self.tree.root, (size[0], bin_id), size[1])
+        return node.bin if node else None
+
+    def _first(self, node, key, secondary):
+        # Recursion depth is bounded by the tree height
+        if node is None or node.best < secondary:
+            return None
+        if node.key < key:
+            return self._first(node.right, key, secondary)
+        found = self._first(node.left, key, secondary)
+        if found is not None:
+            return found
+        if node.secondary >= secondary:
+            return node
+        return self._first(node.right, key, secondary)
+
+    def _last(self, node, key, secondary):
+        if node is None or node.best < secondary:
+            return None
+        if node.key > key:
+            return self._last(node.left, key, secondary)
+        found = self._last(node.right, key, secondary)
+        if found is not None:
+            return found
+        if node.secondary >= secondary:
+            return node
+        return self._last(node.left, key, secondary)
+
+    def count_at_least(self, size):
+        """Number of bins with primary >= size[0] and secondary >= size[1]."""
+        count = 0
+        stack = [self.tree.root]
+        key = (size[0], LOWEST_ID)
+        while stack:
+            node = stack.pop()
+            if node is None or node.best < size[1]:
+                continue
+            if node.key < key:
+                stack.append(node.right)
+                continue
+            if node.secondary >= size[1]:
+                count += 1
+            stack.append(node.left)
+            stack.append(node.right)
+        return count
+
+    def max(self):
+        if self.tree.root is None:
+            return None
+        return self.tree.rightmost(self.tree.root).bin
+
+    def total_capacity(self):
+        return tuple(self.totals)
+
+
+class VectorGCMS:
+    """Bins and objects over (weight, volume) sizes and capacities; see the module docstring.
+
+    Offers the GCMS bin, object and lookup operations, with 2-D sizes and
+    capacities. It holds its own bin_manager and directory rather than
+    subclassing GCMS, so GCMS's 1-D operations (snapshots, the operation
+    log, stats and kth_largest_bin) are not there to be called by mistake.
+    Re-keys are not deferred, and batch() only exists so code written
+    against GCMS can run its block.
+    """
+    def __init__(self, directory=None):
+        self.bin_manager = AVLManager(VectorCapacityIndex())
+        # object_id -> bin_id; pass NewAvl() for an ordered, range-scannable directory
+        self.directory = directory if directory is not None else ObjectDirectory()
+
+    def add_bin(self, bin_id, capacity):
+        """Add an empty bin; raises ValueError if bin_id is taken or outside 64 signed bits."""
+        self.bin_manager.insert(bin_id, tuple(capacity))
+
+    def add_bins(self, bins):
+        """Add (bin_id, capacity) pairs, adding none of them if one is rejected."""
+        self.bin_manager.bulk_insert([(bin_id, tuple(capacity)) for bin_id, capacity in bins])
+
+    def resize_bin(self, bin_id, new_capacity):
+        """Change a bin's total capacity; raises ValueError if its objects no longer fit."""
+        bin = self._bin(bin_id)
+        weight = volume = 0
+        for obj in bin.iter_objects():
+            weight += obj.size[0]
+            volume += obj.size[1]
+        if weight > new_capacity[0] or volume > new_capacity[1]:
+            raise ValueError(f"Bin {bin_id} holds {(weight, volume)}, more than {tuple(new_capacity)}")
+        self._set_capacity(bin, (new_capacity[0] - weight, new_capacity[1] - volume))
+
+    def remove_bin(self, bin_id, migrate=True):
+        """Remove a bin, re-placing its objects by their color policies in ID
+        order (or deleting them without migrate).
+
+        If some object fits nowhere else, NoBinFoundException is raised and
+        nothing changes.
+        """
+        bin = self._bin(bin_id)
+        objects = list(bin.iter_objects())
+        # The bin must not compete for its own objects
+        self.bin_manager.delete_by_capacity(bin_id, bin.capacity)
+        if migrate:
+            targets = []
+            for obj in objects:
+                target = self._find_suitable_bin(obj)
+                if target is None:
+                    for moved, taken in zip(objects, targets):
+                        self._set_capacity(taken, _plus(taken.capacity, moved.size))
+                    self.bin_manager.insert_by_capacity(bin)
+                    raise NoBinFoundException()
+                self._set_capacity(target, _minus(target.capacity, obj.size))
+                targets.append(target)
+            for obj, target in zip(objects, targets):
+                target.objects_tree.insertion(obj)
+                self.directory.delete(obj.object_id)
+                self.directory.insert(obj.object_id, target.bin_id)
+        else:
+            for obj in objects:
+                self.directory.delete(obj.object_id)
+        self.bin_manager.delete_by_id(bin_id)
+
+    def move_object(self, object_id, bin_id):
+        """Move a placed object into another bin, bypassing the color policies.
+
+        Raises KeyError for an unknown object or bin, ValueError if the
+        object does not fit.
+        """
+        source = self._bin_of(object_id)
+        target = self._bin(bin_id)
+        if target is source:
+            return
+        obj = source.objects_tree.search_object(source.objects_tree.root, object_id)
+        if obj.size[0] > target.capacity[0] or obj.size[1] > target.capacity[1]:
+            raise ValueError(f"Object {object_id} of size {obj.size} does not fit in bin {bin_id}")
+        source.objects_tree.delete_object(obj)
+        self._set_capacity(source, _plus(source.capacity, obj.size))
+        self._set_capacity(target, _minus(target.capacity, obj.size))
+        target.objects_tree.insertion(obj)
+        self.directory.delete(object_id)
+        self.directory.insert(object_id, bin_id)
+
+    def add_object(self, object_id, size, color):
+        obj = Object(object_id, tuple(size), color)
+        suitable_bin = self._find_suitable_bin(obj)
+        if suitable_bin is None:
+            raise NoBinFoundException()
+        suitable_bin.objects_tree.insertion(obj)
+        self.directory.insert(object_id, suitable_bin.bin_id)
+        self._set_capacity(suitable_bin, _minus(suitable_bin.capacity, obj.size))
+        return suitable_bin.bin_id
+
+    def add_objects(self, objects):
+        """Place (object_id, size, color) tuples in order; return their bin ids.
+
+        A NoBinFoundException stops the batch, leaving the objects before it placed.
+        """
+        return [self.add_object(object_id, size, color) for object_id, size, color in objects]
+
+    def delete_object(self, object_id):
+        bin = self._bin_of(object_id)
+        obj = bin.objects_tree.search_object(bin.objects_tree.root, object_id)
+        bin.objects_tree.delete_object(obj)
+        self.directory.delete(object_id)
+        self._set_capacity(bin, _plus(bin.capacity, obj.size))
+
+    def delete_objects(self, object_ids):
+        for object_id in object_ids:
+            self.delete_object(object_id)
+
+    @contextmanager
+    def batch(self):
+        """Run the block; unlike GCMS.batch(), nothing is deferred."""
+        yield self
+
+    def _bin(self, bin_id):
+        bin = self.bin_manager.get(bin_id)
+        if bin is None:
+            raise KeyError(bin_id)
+        return bin
+
+    def _bin_of(self, object_id):
+        bin_id = self.directory.get(object_id)
+        if bin_id is None:
+            raise KeyError(object_id)
+        return self.bin_manager.get(bin_id)
+
+    def _set_capacity(self, bin, new_capacity):
+        self.bin_manager.update_capacity(bin, new_capacity)
+
+    def object_info(self, object_id):
+        return self.directory.get(object_id)
+
+    def objects_in_range(self, start=None, stop=None):
+        """(object_id, bin_id) pairs with start <= object_id < stop, in id order."""
+        if not self.directory.ordered:
+            raise TypeError("Range scans need an ordered directory, e.g. VectorGCMS(directory=NewAvl())")
+        return self.directory.items(start, stop)
+
+    def bin_info(self, bin_id):
+        """((weight, volume) remaining, object IDs) of a bin, or None."""
+        bin = self.bin_manager.get(bin_id)
+        if bin is None:
+            print(f"Bin {bin_id} not found.")
+            return None
+        return bin.capacity, bin.get_object_ids()
+
+    def iter_bin_objects(self, bin_id, start_after=None, limit=None):
+        """Iterate a bin's object IDs in order; see GCMS.iter_bin_objects."""
+        object_ids = self._bin(bin_id).iter_object_ids(start_after)
+        return object_ids if limit is None else islice(object_ids, limit)
+
+    def total_free_capacity(self):
+        """(weight, volume) free over all bins."""
+        return self.bin_manager.capacity_index.total_capacity()
+
+    def count_bins_at_least(self, capacity):
+        """Number of bins with at least capacity free in both dimensions."""
+        return self.bin_manager.capacity_index.count_at_least(tuple(capacity))
+
+    def _find_suitable_bin(self, obj):
+        index = self.bin_manager.capacity_index
+        size, color = obj.size, obj.color
+        if color in (Color.BLUE, Color.YELLOW):
+            # Smallest primary capacity that fits both dimensions
+            suitable_bin = index.ceiling(size, LOWEST_ID)
+            if suitable_bin is None or color == Color.BLUE:
+                return suitable_bin
+            # YELLOW: highest id among the fitting bins with that primary capacity
+            return index.floor((suitable_bin.capacity[0], size[1]), HIGHEST_ID)
+
+        # Largest primary capacity among the bins with room in the second dimension
+        suitable_bin = index.floor((float("inf"), size[1]), HIGHEST_ID)
+        if suitable_bin is None or suitable_bin.capacity[0] < size[0]:
+            return None
+        if color == Color.GREEN:
+            return suitable_bin
+        # RED: lowest id among the fitting bins with that primary capacity
+        return index.ceiling((suitable_bin.capacity[0], size[1]), LOWEST_ID)